@@ -36,9 +36,28 @@ class Config:
     WEBAPP_HOST: str = os.getenv("WEBAPP_HOST", "0.0.0.0")
     WEBAPP_PORT: int = int(os.getenv("WEBAPP_PORT", "5000"))
     
+    # Встроенный dev-сервер Flask в потоке бота. Для продакшена установите
+    # false и запускайте веб-приложение отдельно: python -m webapp.server
+    WEBAPP_EMBEDDED: bool = os.getenv("WEBAPP_EMBEDDED", "true").lower() == "true"
+    
+    # Настройки gunicorn (python -m webapp.server)
+    WEBAPP_WORKERS: int = int(os.getenv("WEBAPP_WORKERS", "2"))
+    WEBAPP_THREADS: int = int(os.getenv("WEBAPP_THREADS", "8"))
+    
+    # Адрес Bot API сервера. Пусто - облачный api.telegram.org. Для локального
+    # сервера (например, TDLight) укажите http://host:8081/bot
+    TELEGRAM_API_URL: str = os.getenv("TELEGRAM_API_URL", "")
+    
+    # Получать полный список участников методом getParticipants.
+    # Метод есть только в TDLight Bot API, требует TELEGRAM_API_URL
+    TDLIGHT_PARTICIPANTS: bool = os.getenv("TDLIGHT_PARTICIPANTS", "false").lower() == "true"
+    
     # Максимальное время жизни данных WebApp (в секундах)
     WEBAPP_DATA_MAX_AGE: int = int(os.getenv("WEBAPP_DATA_MAX_AGE", "86400"))  # 24 часа
     
+    # Сколько секунд /health отдает результат последней проверки. 0 - без кэша
+    HEALTH_CACHE_TTL: float = float(os.getenv("HEALTH_CACHE_TTL", "5"))
+    
     @classmethod
     def validate(cls) -> None:
         """
@@ -64,10 +83,25 @@ class Config:
         except (ValueError, TypeError):
             errors.append(f"WEBAPP_DATA_MAX_AGE должен быть числом, получено: {os.getenv('WEBAPP_DATA_MAX_AGE', '86400')}")
         
+        if cls.WEBAPP_WORKERS <= 0:
+            errors.append(f"WEBAPP_WORKERS должен быть положительным числом, получено: {cls.WEBAPP_WORKERS}")
+        
+        if cls.WEBAPP_THREADS <= 0:
+            errors.append(f"WEBAPP_THREADS должен быть положительным числом, получено: {cls.WEBAPP_THREADS}")
+        
+        if cls.HEALTH_CACHE_TTL < 0:
+            errors.append(f"HEALTH_CACHE_TTL не может быть отрицательным, получено: {cls.HEALTH_CACHE_TTL}")
+        
         # Проверка URL
         if cls.WEBAPP_URL and not (cls.WEBAPP_URL.startswith('http://') or cls.WEBAPP_URL.startswith('https://')):
             errors.append(f"WEBAPP_URL должен начинаться с http:// или https://, получено: {cls.WEBAPP_URL}")
         
+        if cls.TELEGRAM_API_URL and not cls.TELEGRAM_API_URL.startswith(('http://', 'https://')):
+            errors.append(f"TELEGRAM_API_URL должен начинаться с http:// или https://, получено: {cls.TELEGRAM_API_URL}")
+        
+        if cls.TDLIGHT_PARTICIPANTS and not cls.TELEGRAM_API_URL:
+            errors.append("TDLIGHT_PARTICIPANTS требует TELEGRAM_API_URL с адресом TDLight Bot API сервера")
+        
         # WEBAPP_SECRET_KEY обязателен и должен отличаться от BOT_TOKEN
         if not cls.WEBAPP_SECRET_KEY:
             errors.append(
@@ -34,6 +34,37 @@ MENTION_TRIGGERS = ["@all", "@everybody_mention_bot", "@everyone"]
 # Максимальная длина сообщения Telegram
 MAX_MESSAGE_LENGTH = 4096
 
+# Минимальный интервал между повторными регистрациями чата из сообщений (секунды)
+CHAT_REGISTER_INTERVAL = 60
+
+# Время жизни кэша прав администраторов/создателя (секунды)
+ADMIN_CACHE_TTL = 300.0
+
+# Время жизни кэша информации о чате (секунды)
+CHAT_CACHE_TTL = 60.0
+
+# Общий лимит запросов к Telegram Bot API (запросов в секунду)
+TELEGRAM_GLOBAL_RATE = 30.0
+
+# Лимит сообщений в одну группу: 20 сообщений в минуту
+TELEGRAM_GROUP_RATE = 20 / 60
+TELEGRAM_GROUP_BURST = 20.0
+
+# Максимальное число групп, для которых хранится состояние лимита
+TELEGRAM_GROUP_BUCKETS_MAX = 1024
+
+# Максимальная длина init_data Telegram WebApp (символов). Реальные
+# init_data занимают сотни байт; более длинные строки отклоняются до
+# проверки подписи
+WEBAPP_INIT_DATA_MAX_LENGTH = 10000
+
+# Размер страницы getParticipants (TDLight Bot API)
+TDLIGHT_PARTICIPANTS_PAGE_SIZE = 200
+
+# Максимум участников, загружаемых через getParticipants: защита от
+# бесконечной загрузки, если сервер не возвращает короткую страницу
+TDLIGHT_PARTICIPANTS_MAX = 50000
+
 # Групповые типы чатов (где работает функционал упоминаний)
 GROUP_CHAT_TYPES = [ChatType.GROUP.value, ChatType.SUPERGROUP.value]
 
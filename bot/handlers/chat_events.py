@@ -35,13 +35,16 @@ async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAUL
     except Exception as e:
         logger.error(f"Ошибка при регистрации чата {chat.id}: {e}", exc_info=True)
     
-    # Инвалидируем кэш участников для этого чата
-    cache = get_cache()
-    cache.invalidate_pattern(f"members:{chat.id}:")
+    # Инвалидируем кэш участников и прав администраторов для этого чата
+    # (один проход по ключам кэша)
+    get_cache().invalidate_pattern((f"members:{chat.id}:", f"admins:{chat.id}:"))
     
     new_status = update.chat_member.new_chat_member.status
     old_status = update.chat_member.old_chat_member.status
     
+    # Обновляем статус участника в карте администраторов
+    chat_storage.update_member_status(chat.id, update.chat_member.new_chat_member.user.id, new_status)
+    
     # Логируем добавление бота
     if new_status in [ChatMemberUpdateStatus.MEMBER.value, ChatMemberUpdateStatus.ADMINISTRATOR.value, ChatMemberUpdateStatus.CREATOR.value] and old_status == ChatMemberUpdateStatus.LEFT.value:
         logger.info(f"[ChatEvents] Бот добавлен в чат: {chat.id} ({chat.type}) - {chat.title or 'Без названия'}")
@@ -68,16 +71,22 @@ async def handle_my_chat_member_update(update: Update, context: ContextTypes.DEF
     old_status = update.my_chat_member.old_chat_member.status
     
     # ВСЕГДА регистрируем чат при любом изменении статуса
-    # Это критично для получения списка всех чатов, где добавлен бот
+    # Это критично для получения списка всех чатов, где добавлен бот.
+    # Статус бота сохраняется вместе с чатом: веб-приложение пропускает
+    # чаты, где бот не администратор, без запросов к Telegram API
     try:
-        chat_storage.register_chat(chat)
+        chat_storage.register_chat(chat, bot_status=new_status)
     except Exception as e:
         logger.error(f"Ошибка при регистрации чата {chat.id}: {e}", exc_info=True)
     
     # Инвалидируем кэш при изменении статуса бота
     cache = get_cache()
-    cache.invalidate_pattern(f"chats:")
-    cache.invalidate_pattern(f"members:{chat.id}:")
+    cache.invalidate_pattern(("chats:", f"members:{chat.id}:", f"admins:{chat.id}:"))
+    cache.delete(f"chat:{chat.id}")
+    
+    # Пока бот не был администратором, события chat_member для этого чата
+    # не приходили, поэтому статусы администраторов загружаются заново
+    chat_storage.forget_admins(chat.id)
     
     # Регистрируем чат при добавлении бота
     if new_status in [ChatMemberUpdateStatus.MEMBER.value, ChatMemberUpdateStatus.ADMINISTRATOR.value, ChatMemberUpdateStatus.CREATOR.value] and old_status == ChatMemberUpdateStatus.LEFT.value:
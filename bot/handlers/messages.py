@@ -1,5 +1,7 @@
 """Обработчики текстовых сообщений"""
 import logging
+import time
+from typing import Dict
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import TelegramError
@@ -9,11 +11,16 @@ from bot.services.chat_service import ChatService
 from bot.services.mention_service import MentionService
 from bot.services.chat_storage_service import chat_storage
 from bot.config import Config
-from bot.constants import GROUP_CHAT_TYPES
+from bot.constants import GROUP_CHAT_TYPES, CHAT_REGISTER_INTERVAL
 from bot.utils.errors import handle_telegram_error, get_user_friendly_message
 
 logger = logging.getLogger(__name__)
 
+# Время последней регистрации чата из сообщений: chat_id -> time.monotonic()
+# register_chat перезаписывает весь файл хранилища, поэтому в активных группах
+# повторные регистрации на каждое сообщение схлопываются до одной за интервал
+_REGISTERED: Dict[int, float] = {}
+
 
 class MessageHandler:
     """Обработчик текстовых сообщений"""
@@ -31,11 +38,15 @@ class MessageHandler:
         
         # ВСЕГДА регистрируем чат в хранилище при любом сообщении
         # Это критично, так как Telegram Bot API не предоставляет способ получить список всех чатов
-        try:
-            chat_storage.register_chat(chat)
-        except Exception as e:
-            logger.error(f"Ошибка при регистрации чата {chat_id}: {e}", exc_info=True)
-        logger.debug(f"[MessageHandler] Чат {chat_id} ({chat.type}) зарегистрирован при получении сообщения")
+        now = time.monotonic()
+        last_registered = _REGISTERED.get(chat_id)
+        if last_registered is None or now - last_registered > CHAT_REGISTER_INTERVAL:
+            try:
+                chat_storage.register_chat(chat)
+                _REGISTERED[chat_id] = now
+            except Exception as e:
+                logger.error(f"Ошибка при регистрации чата {chat_id}: {e}", exc_info=True)
+            logger.debug(f"[MessageHandler] Чат {chat_id} ({chat.type}) зарегистрирован при получении сообщения")
         
         # Если нет текста, просто выходим (но чат уже зарегистрирован)
         if not update.message.text:
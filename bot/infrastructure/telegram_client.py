@@ -5,6 +5,10 @@ from telegram import Bot
 from telegram.error import TelegramError
 
 from bot.config import Config
+from bot.constants import CHAT_CACHE_TTL
+from bot.services.chat_service import ChatService
+from bot.utils.cache import cached
+from bot.utils.rate_limit import RateLimitedRequest
 from bot.utils.errors import handle_telegram_error, get_user_friendly_message
 from bot.utils.retry import retry_async, RetryConfig
 
@@ -19,6 +23,7 @@ class TelegramClient:
     - Переиспользование одного экземпляра Bot
     - Автоматическую инициализацию
     - Retry логику для всех запросов
+    - Ограничение частоты запросов к Bot API
     - Централизованную обработку ошибок
     """
     
@@ -47,7 +52,8 @@ class TelegramClient:
             Экземпляр Bot
         """
         if self._bot is None:
-            self._bot = Bot(token=self._token)
+            bot_kwargs = {'base_url': Config.TELEGRAM_API_URL} if Config.TELEGRAM_API_URL else {}
+            self._bot = Bot(token=self._token, request=RateLimitedRequest(), **bot_kwargs)
             logger.info("[TelegramClient] Создан новый экземпляр Bot")
         return self._bot
     
@@ -62,10 +68,25 @@ class TelegramClient:
             self._initialized = True
             logger.debug("[TelegramClient] Bot инициализирован")
     
+    async def shutdown(self) -> None:
+        """
+        Завершает работу бота и закрывает пул соединений.
+        
+        Должен вызываться в том же event loop, в котором бот был
+        инициализирован.
+        """
+        if self._initialized:
+            await self.bot.shutdown()
+            self._initialized = False
+            logger.debug("[TelegramClient] Bot остановлен")
+    
+    @cached(ttl=CHAT_CACHE_TTL, key_func=lambda self, chat_id: f"chat:{chat_id}")
     async def get_chat(self, chat_id: int):
         """
         Получает информацию о чате с retry логикой.
         
+        Результат кэшируется на CHAT_CACHE_TTL секунд, ошибки не кэшируются.
+        
         Args:
             chat_id: ID чата
             
@@ -189,6 +210,9 @@ class TelegramClient:
 # Глобальный экземпляр клиента для переиспользования
 _global_client: Optional[TelegramClient] = None
 
+# Глобальный ChatService поверх Bot глобального клиента
+_global_chat_service: Optional[ChatService] = None
+
 
 def get_telegram_client() -> TelegramClient:
     """
@@ -204,3 +228,31 @@ def get_telegram_client() -> TelegramClient:
         _global_client = TelegramClient()
         logger.info("[TelegramClient] Создан глобальный экземпляр TelegramClient")
     return _global_client
+
+
+def get_chat_service() -> ChatService:
+    """
+    Получает глобальный экземпляр ChatService.
+    
+    ChatService не хранит состояния запроса (кэши администраторов и чатов
+    общие для процесса), поэтому один экземпляр поверх общего Bot
+    используется всеми запросами Mini App.
+    
+    Returns:
+        Экземпляр ChatService
+    """
+    global _global_chat_service
+    if _global_chat_service is None:
+        _global_chat_service = ChatService(get_telegram_client().bot)
+    return _global_chat_service
+
+
+async def close_telegram_client() -> None:
+    """
+    Останавливает глобальный TelegramClient, если он был создан.
+    
+    Вызывается при завершении процесса, чтобы закрыть соединения
+    с Telegram API.
+    """
+    if _global_client is not None:
+        await _global_client.shutdown()
@@ -0,0 +1,27 @@
+"""Модели для работы с чатами"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ChatRow:
+    """
+    Строка списка чатов для ответа Mini App.
+
+    __slots__ объявлены явно (dataclass(slots=True) доступен только с
+    Python 3.10): экземпляры меньше словаря, а orjson сериализует
+    dataclass напрямую. title_lc - ключ сортировки по названию, он не
+    является полем dataclass и не попадает в JSON. Используется casefold:
+    это корректное регистронезависимое сравнение Unicode.
+    """
+    __slots__ = ('id', 'title', 'type', 'username', 'members_count', 'photo_url', 'title_lc')
+
+    id: int
+    title: str
+    type: str
+    username: Optional[str]
+    members_count: Optional[int]
+    photo_url: Optional[str]
+
+    def __post_init__(self) -> None:
+        self.title_lc = self.title.casefold()
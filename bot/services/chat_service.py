@@ -1,10 +1,19 @@
 """Сервис для работы с чатами и участниками"""
 import logging
-from typing import List
-from telegram import Bot, User
-from telegram.error import TelegramError
+from typing import List, Optional, Set, Tuple
+from telegram import Bot, ChatMember, User
+from telegram.error import TelegramError, TimedOut, NetworkError, RetryAfter, Conflict
 
-from bot.constants import ADMIN_STATUSES, ChatMemberStatus
+from bot.config import Config
+from bot.constants import (
+    ADMIN_STATUSES,
+    ADMIN_CACHE_TTL,
+    TDLIGHT_PARTICIPANTS_MAX,
+    TDLIGHT_PARTICIPANTS_PAGE_SIZE,
+    ChatMemberStatus,
+)
+from bot.services.chat_storage_service import chat_storage
+from bot.utils.cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -15,16 +24,133 @@ class ChatService:
     def __init__(self, bot: Bot):
         self.bot = bot
     
+    @cached(ttl=ADMIN_CACHE_TTL, key_func=lambda self, chat_id: f"admins:{chat_id}:list")
+    async def get_chat_administrators(self, chat_id: int) -> Tuple[ChatMember, ...]:
+        """
+        Получает список администраторов чата (включая создателя).
+        
+        Результат кэшируется на ADMIN_CACHE_TTL секунд: по одному списку
+        проверяются и права бота, и права пользователя. Ошибки не кэшируются.
+        
+        Args:
+            chat_id: ID чата
+            
+        Returns:
+            Кортеж ChatMember администраторов
+            
+        Raises:
+            TelegramError: При ошибке Telegram API
+        """
+        admins = await self.bot.get_chat_administrators(chat_id)
+        logger.debug("[ChatService] Получено %s администраторов для чата %s", len(admins), chat_id)
+        return admins
+    
+    async def get_participants(self, chat_id: int) -> List[ChatMember]:
+        """
+        Получает всех участников чата методом getParticipants.
+        
+        Метод есть только в TDLight Bot API (TDLIGHT_PARTICIPANTS): список
+        приходит страницами по TDLIGHT_PARTICIPANTS_PAGE_SIZE, а не одним
+        запросом getChatMember на каждого участника.
+        
+        Загрузка прекращается на неполной странице, на странице без новых
+        пользователей (сервер повторяет страницу) или после
+        TDLIGHT_PARTICIPANTS_MAX участников.
+        
+        Args:
+            chat_id: ID чата
+            
+        Returns:
+            Список ChatMember участников
+            
+        Raises:
+            TelegramError: При ошибке Bot API
+        """
+        participants: List[ChatMember] = []
+        seen_ids: Set[int] = set()
+        offset = 0
+        while offset < TDLIGHT_PARTICIPANTS_MAX:
+            page = await self.bot.do_api_request(
+                'getParticipants',
+                api_kwargs={
+                    'chat_id': chat_id,
+                    'filter': 'members',
+                    'offset': offset,
+                    'limit': TDLIGHT_PARTICIPANTS_PAGE_SIZE,
+                },
+                return_type=ChatMember
+            )
+            offset += len(page)
+            
+            new_members = [member for member in page if member.user.id not in seen_ids]
+            if not new_members:
+                break
+            seen_ids.update(member.user.id for member in new_members)
+            participants.extend(new_members)
+            
+            if len(page) < TDLIGHT_PARTICIPANTS_PAGE_SIZE:
+                break
+        else:
+            logger.warning(
+                "[ChatService] getParticipants: чат %s, загрузка остановлена на %s участниках",
+                chat_id, len(participants)
+            )
+        
+        logger.debug("[ChatService] getParticipants: %s участников в чате %s", len(participants), chat_id)
+        return participants
+    
+    async def get_admin_rights(self, chat_id: int, user_id: Optional[int]) -> Tuple[bool, bool]:
+        """
+        Проверяет права бота и пользователя по одному списку администраторов.
+        
+        Если статусы администраторов отслеживаются по событиям (процесс бота),
+        проверка выполняется без запросов к Telegram API.
+        
+        Args:
+            chat_id: ID чата для проверки
+            user_id: ID пользователя для проверки (None - только права бота)
+            
+        Returns:
+            Кортеж (бот является администратором, пользователь является создателем)
+            
+        Raises:
+            TelegramError: При retryable ошибках Telegram API (для обработки через retry)
+        """
+        # Статусы, поддерживаемые событиями chat_member, не требуют запроса к API
+        statuses = chat_storage.get_admin_statuses(chat_id)
+        if statuses is None:
+            try:
+                admins = await self.get_chat_administrators(chat_id)
+            except (TimedOut, NetworkError, RetryAfter, Conflict) as e:
+                # Retryable ошибки - пробрасываем для обработки через retry
+                logger.warning(f"[ChatService] Retryable ошибка при получении администраторов чата {chat_id}: {e}")
+                raise
+            except TelegramError as e:
+                # Не retryable ошибки Telegram API - прав нет
+                logger.error(f"[ChatService] Ошибка Telegram API при получении администраторов чата {chat_id}: {e}")
+                return False, False
+            
+            statuses = {admin.user.id: admin.status for admin in admins}
+            chat_storage.set_admin_statuses(chat_id, statuses)
+        
+        is_bot_admin = statuses.get(self.bot.id) in ADMIN_STATUSES
+        is_creator = user_id is not None and statuses.get(user_id) == ChatMemberStatus.CREATOR.value
+        
+        logger.debug(
+            "[ChatService] Чат %s: бот админ = %s, пользователь %s создатель = %s",
+            chat_id, is_bot_admin, user_id, is_creator
+        )
+        return is_bot_admin, is_creator
+    
     async def is_bot_admin(self, chat_id: int) -> bool:
-        """Проверяет, является ли бот администратором чата"""
-        try:
-            bot_member = await self.bot.get_chat_member(chat_id, self.bot.id)
-            is_admin = bot_member.status in ADMIN_STATUSES
-            logger.info(f"[ChatService] Бот {self.bot.id} в чате {chat_id}: статус = {bot_member.status}, является админом = {is_admin}")
-            return is_admin
-        except TelegramError as e:
-            logger.error(f"[ChatService] Ошибка при проверке прав администратора для чата {chat_id}: {e}")
-            return False
+        """
+        Проверяет, является ли бот администратором чата.
+        
+        Raises:
+            TelegramError: При retryable ошибках Telegram API (для обработки через retry)
+        """
+        is_bot_admin, _ = await self.get_admin_rights(chat_id, None)
+        return is_bot_admin
     
     async def get_all_members(self, chat_id: int) -> List[User]:
         """
@@ -44,10 +170,14 @@ class ChatService:
         
         try:
             # Получаем всех администраторов (включая создателя)
-            admins = await self.bot.get_chat_administrators(chat_id)
+            chat_members = await self.bot.get_chat_administrators(chat_id)
             
-            for admin in admins:
-                user = admin.user
+            # TDLight Bot API отдает и остальных участников
+            if Config.TDLIGHT_PARTICIPANTS:
+                chat_members = (*chat_members, *await self.get_participants(chat_id))
+            
+            for member in chat_members:
+                user = member.user
                 if not user.is_bot and user.id not in seen_user_ids:
                     members.append(user)
                     seen_user_ids.add(user.id)
@@ -58,7 +188,7 @@ class ChatService:
             # Альтернатива - использовать Telegram Client API (pyrogram, telethon),
             # но это выходит за рамки Bot API.
             
-            logger.info(f"Получено {len(members)} участников из администраторов чата {chat_id}")
+            logger.debug("Получено %s участников из администраторов чата %s", len(members), chat_id)
             
         except TelegramError as e:
             logger.error(f"Ошибка при получении участников чата: {e}")
@@ -88,61 +218,37 @@ class ChatService:
             False в противном случае
             
         Raises:
-            TelegramError: При ошибках Telegram API (для обработки через retry)
+            TelegramError: При retryable ошибках Telegram API (для обработки через retry)
         """
-        from telegram.error import TimedOut, NetworkError, RetryAfter, Conflict
-        
-        logger.info(f"[ChatService] Проверка прав создателя: чат {chat_id}, пользователь {user_id}")
-        
-        try:
-            # Получаем список администраторов
-            admins = await self.bot.get_chat_administrators(chat_id)
-            logger.info(f"[ChatService] Получено {len(admins)} администраторов для чата {chat_id}")
-        except (TimedOut, NetworkError, RetryAfter, Conflict) as e:
-            # Retryable ошибки - пробрасываем для обработки через retry
-            logger.warning(f"[ChatService] Retryable ошибка при проверке прав создателя для чата {chat_id}, пользователя {user_id}: {e}")
-            raise
-        except TelegramError as e:
-            # Не retryable ошибки Telegram API - возвращаем False
-            logger.error(f"[ChatService] Ошибка Telegram API при проверке прав создателя для чата {chat_id}, пользователя {user_id}: {e}")
-            return False
-        except Exception as e:
-            # Неожиданные ошибки - логируем и возвращаем False
-            logger.error(f"[ChatService] Неожиданная ошибка при проверке прав создателя для чата {chat_id}, пользователя {user_id}: {e}", exc_info=True)
-            return False
-        
-        # Ищем пользователя среди администраторов
-        try:
-            for admin in admins:
-                admin_user_id = admin.user.id
-                admin_status = admin.status
-                logger.debug(f"[ChatService] Админ: {admin_user_id}, статус: {admin_status}")
-                
-                if admin_user_id == user_id:
-                    is_creator = admin_status == "creator"
-                    logger.info(f"[ChatService] Пользователь {user_id} найден, статус: {admin_status}, является создателем: {is_creator}")
-                    return is_creator
-            
-            logger.warning(f"[ChatService] Пользователь {user_id} не найден среди администраторов чата {chat_id}")
-            return False
-        except Exception as e:
-            logger.error(f"[ChatService] Ошибка при обработке списка администраторов: {e}", exc_info=True)
-            return False
+        _, is_creator = await self.get_admin_rights(chat_id, user_id)
+        return is_creator
     
     async def get_chat_members_list(self, chat_id: int) -> List[dict]:
         """
-        Получает список всех участников чата с информацией о статусе
+        Получает список известных участников чата с информацией о статусе
         Возвращает список словарей с информацией о пользователях
+        
+        Bot API не позволяет перечислить всех участников группы, поэтому
+        список строится по администраторам (включая создателя) без запросов
+        по каждому участнику. Используется кэшированный список
+        администраторов: тот же, по которому проверяются права, поэтому
+        проверка прав и получение участников стоят одного запроса к API.
+        С TDLight Bot API (TDLIGHT_PARTICIPANTS) список дополняется всеми
+        участниками через getParticipants.
         """
         members_list = []
         seen_user_ids = set()
         
         try:
             # Получаем всех администраторов (включая создателя)
-            admins = await self.bot.get_chat_administrators(chat_id)
+            chat_members = await self.get_chat_administrators(chat_id)
+            
+            # TDLight Bot API отдает и остальных участников
+            if Config.TDLIGHT_PARTICIPANTS:
+                chat_members = (*chat_members, *await self.get_participants(chat_id))
             
-            for admin in admins:
-                user = admin.user
+            for member in chat_members:
+                user = member.user
                 if user.id not in seen_user_ids:
                     # Ленивая загрузка фото профиля - не загружаем сразу, только при необходимости
                     # Фото будет загружено на фронтенде при необходимости через Telegram Bot API
@@ -156,24 +262,24 @@ class ChatService:
                         'last_name': user.last_name or '',
                         'username': user.username or '',
                         'is_bot': user.is_bot,
-                        'status': admin.status,  # creator, administrator, member (из ChatMemberStatus)
+                        'status': member.status,  # creator, administrator, member (из ChatMemberStatus)
                         'profile_photo_url': profile_photo_url,  # URL фото профиля
-                        'can_be_edited': getattr(admin, 'can_be_edited', False),
-                        'can_manage_chat': getattr(admin, 'can_manage_chat', False),
-                        'can_delete_messages': getattr(admin, 'can_delete_messages', False),
-                        'can_manage_video_chats': getattr(admin, 'can_manage_video_chats', False),
-                        'can_restrict_members': getattr(admin, 'can_restrict_members', False),
-                        'can_promote_members': getattr(admin, 'can_promote_members', False),
-                        'can_change_info': getattr(admin, 'can_change_info', False),
-                        'can_invite_users': getattr(admin, 'can_invite_users', False),
-                        'can_post_messages': getattr(admin, 'can_post_messages', False),
-                        'can_edit_messages': getattr(admin, 'can_edit_messages', False),
-                        'can_pin_messages': getattr(admin, 'can_pin_messages', False),
+                        'can_be_edited': getattr(member, 'can_be_edited', False),
+                        'can_manage_chat': getattr(member, 'can_manage_chat', False),
+                        'can_delete_messages': getattr(member, 'can_delete_messages', False),
+                        'can_manage_video_chats': getattr(member, 'can_manage_video_chats', False),
+                        'can_restrict_members': getattr(member, 'can_restrict_members', False),
+                        'can_promote_members': getattr(member, 'can_promote_members', False),
+                        'can_change_info': getattr(member, 'can_change_info', False),
+                        'can_invite_users': getattr(member, 'can_invite_users', False),
+                        'can_post_messages': getattr(member, 'can_post_messages', False),
+                        'can_edit_messages': getattr(member, 'can_edit_messages', False),
+                        'can_pin_messages': getattr(member, 'can_pin_messages', False),
                     }
                     members_list.append(member_info)
                     seen_user_ids.add(user.id)
             
-            logger.info(f"Получено {len(members_list)} участников из администраторов чата {chat_id}")
+            logger.debug("Получено %s участников чата %s", len(members_list), chat_id)
             
         except TelegramError as e:
             logger.error(f"Ошибка при получении участников чата: {e}")
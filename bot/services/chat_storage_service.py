@@ -2,10 +2,22 @@
 import logging
 import json
 import os
-from typing import List, Dict, Optional, Any
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Any, Tuple
 from datetime import datetime
 from telegram import Chat, Bot
 
+from bot.constants import ADMIN_CACHE_TTL, ADMIN_STATUSES
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - нет на Windows
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 # Глобальный экземпляр сервиса хранения чатов
@@ -22,10 +34,21 @@ class ChatStorageService:
         # In-memory хранилище (можно заменить на БД)
         self._chats: Dict[int, Dict] = {}
         self._storage_file = storage_file
+        # (inode, mtime в наносекундах) файла на момент последней
+        # загрузки/сохранения. Запись заменяет файл, поэтому меняется inode
+        self._file_version: Optional[Tuple[int, int]] = None
+        # Файл изменяют несколько процессов (бот и воркеры gunicorn) и
+        # потоки внутри процесса: изменения выполняются под блокировкой
+        self._lock = threading.Lock()
+        # Статусы администраторов: chat_id -> (time.monotonic() загрузки,
+        # {user_id: status}). Поддерживаются событиями chat_member/my_chat_member,
+        # поэтому используются только в процессе, который получает обновления бота
+        self._admins: Dict[int, Tuple[float, Dict[int, str]]] = {}
+        self._admin_tracking = False
         # Загружаем чаты из файла при инициализации
         self._load_from_file()
     
-    def register_chat(self, chat: Chat) -> None:
+    def register_chat(self, chat: Chat, bot_status: Optional[str] = None) -> None:
         """
         Регистрирует чат в хранилище.
         
@@ -34,6 +57,8 @@ class ChatStorageService:
         
         Args:
             chat: Объект Chat из Telegram API
+            bot_status: Статус бота в чате из события my_chat_member.
+                None - сохранить известный ранее статус
         """
         try:
             chat_data = {
@@ -45,24 +70,30 @@ class ChatStorageService:
                 'members_count': getattr(chat, 'members_count', None)
             }
             
-            is_new = chat.id not in self._chats
-            self._chats[chat.id] = chat_data
+            with self._modify():
+                # Статус бота приходит только событием my_chat_member, поэтому
+                # при обычной перерегистрации он переносится из старой записи
+                if bot_status is None:
+                    bot_status = self._chats.get(chat.id, {}).get('bot_status')
+                if bot_status is not None:
+                    chat_data['bot_status'] = bot_status
+                
+                is_new = chat.id not in self._chats
+                self._chats[chat.id] = chat_data
             
             if is_new:
-                logger.info(f"[ChatStorage] Зарегистрирован новый чат: {chat.id} ({chat.type}) - {chat_data['title']}")
+                logger.info("[ChatStorage] Зарегистрирован новый чат: %s (%s) - %s", chat.id, chat.type, chat_data['title'])
             else:
-                logger.debug(f"[ChatStorage] Обновлен чат: {chat.id} ({chat.type}) - {chat_data['title']}")
+                logger.debug("[ChatStorage] Обновлен чат: %s (%s) - %s", chat.id, chat.type, chat_data['title'])
             
-            # Сохраняем в файл
-            self._save_to_file()
-            
-            logger.debug(f"[ChatStorage] Всего чатов в хранилище: {len(self._chats)}")
+            logger.debug("[ChatStorage] Всего чатов в хранилище: %s", len(self._chats))
             
         except Exception as e:
             logger.error(f"[ChatStorage] Ошибка при регистрации чата: {e}")
     
     def get_chat(self, chat_id: int) -> Optional[Dict]:
         """Получает информацию о чате"""
+        self._reload_if_changed()
         return self._chats.get(chat_id)
     
     def delete_chat(self, chat_id: int) -> bool:
@@ -75,9 +106,9 @@ class ChatStorageService:
         Returns:
             True, если чат был удален, False если не найден
         """
-        if chat_id in self._chats:
-            del self._chats[chat_id]
-            self._save_to_file()
+        with self._modify():
+            deleted = self._chats.pop(chat_id, None) is not None
+        if deleted:
             logger.info(f"[ChatStorage] Чат {chat_id} удален из хранилища")
             return True
         logger.warning(f"[ChatStorage] Попытка удалить несуществующий чат {chat_id}")
@@ -90,8 +121,9 @@ class ChatStorageService:
         Returns:
             Список словарей с информацией о каждом чате
         """
+        self._reload_if_changed()
         chats = list(self._chats.values())
-        logger.debug(f"[ChatStorage] Запрошен список чатов: возвращено {len(chats)} чатов")
+        logger.debug("[ChatStorage] Запрошен список чатов: возвращено %s чатов", len(chats))
         return chats
     
     def get_chats_by_type(self, chat_type: str) -> List[Dict]:
@@ -110,14 +142,16 @@ class ChatStorageService:
             - private: количество приватных чатов
             - channels: количество каналов
         """
-        all_chats = self.get_all_chats()
+        self._reload_if_changed()
         
+        # Один проход по чатам без промежуточных списков
+        type_counts = Counter(chat['type'] for chat in self._chats.values())
         stats = {
-            'total': len(all_chats),
-            'groups': len([c for c in all_chats if c['type'] == 'group']),
-            'supergroups': len([c for c in all_chats if c['type'] == 'supergroup']),
-            'private': len([c for c in all_chats if c['type'] == 'private']),
-            'channels': len([c for c in all_chats if c['type'] == 'channel'])
+            'total': len(self._chats),
+            'groups': type_counts['group'],
+            'supergroups': type_counts['supergroup'],
+            'private': type_counts['private'],
+            'channels': type_counts['channel']
         }
         
         return stats
@@ -135,44 +169,196 @@ class ChatStorageService:
                 'members_count': getattr(chat, 'members_count', None)
             }
             
-            # Сохраняем время регистрации, если чат уже был зарегистрирован
-            if chat_id in self._chats:
-                chat_data['registered_at'] = self._chats[chat_id].get('registered_at')
-            else:
-                chat_data['registered_at'] = datetime.now().isoformat()
-            
-            self._chats[chat_id] = chat_data
-            # Сохраняем в файл
-            self._save_to_file()
+            with self._modify():
+                # Сохраняем время регистрации и статус бота, если чат уже был зарегистрирован
+                if chat_id in self._chats:
+                    chat_data['registered_at'] = self._chats[chat_id].get('registered_at')
+                    if 'bot_status' in self._chats[chat_id]:
+                        chat_data['bot_status'] = self._chats[chat_id]['bot_status']
+                else:
+                    chat_data['registered_at'] = datetime.now().isoformat()
+                
+                self._chats[chat_id] = chat_data
             return chat_data
             
         except Exception as e:
             logger.error(f"Ошибка при обновлении информации о чате {chat_id}: {e}")
             return None
     
+    def enable_admin_tracking(self) -> None:
+        """
+        Включает хранение статусов администраторов.
+        
+        Вызывается процессом бота, который получает события chat_member и
+        my_chat_member. В отдельном процессе веб-приложения события не
+        приходят, и карта статусов не используется.
+        """
+        self._admin_tracking = True
+    
+    def get_admin_statuses(self, chat_id: int) -> Optional[Dict[int, str]]:
+        """
+        Получает статусы администраторов чата.
+        
+        Статусы старше ADMIN_CACHE_TTL не возвращаются, даже если их
+        поддерживают события: пропущенное событие (например, при
+        перезапуске бота) не оставит устаревшие права навсегда.
+        
+        Args:
+            chat_id: ID чата
+            
+        Returns:
+            Словарь {user_id: status} или None, если статусы неизвестны или устарели
+        """
+        if not self._admin_tracking:
+            return None
+        entry = self._admins.get(chat_id)
+        if entry is None:
+            return None
+        loaded_at, statuses = entry
+        if time.monotonic() - loaded_at >= ADMIN_CACHE_TTL:
+            self._admins.pop(chat_id, None)
+            return None
+        return statuses
+    
+    def set_admin_statuses(self, chat_id: int, statuses: Dict[int, str]) -> None:
+        """
+        Сохраняет полный список статусов администраторов чата.
+        
+        Args:
+            chat_id: ID чата
+            statuses: Словарь {user_id: status} по данным getChatAdministrators
+        """
+        if self._admin_tracking:
+            self._admins[chat_id] = (time.monotonic(), statuses)
+    
+    def update_member_status(self, chat_id: int, user_id: int, status: str) -> None:
+        """
+        Обновляет статус участника по событию chat_member.
+        
+        Чаты без загруженного списка администраторов пропускаются: частичная
+        карта дала бы неверный ответ, поэтому такой чат загрузится целиком
+        при следующей проверке.
+        
+        Args:
+            chat_id: ID чата
+            user_id: ID пользователя
+            status: Новый статус участника
+        """
+        entry = self._admins.get(chat_id)
+        if entry is None:
+            return
+        # Время загрузки не обновляется: события не продлевают жизнь карты
+        _, statuses = entry
+        if status in ADMIN_STATUSES:
+            statuses[user_id] = status
+        else:
+            statuses.pop(user_id, None)
+    
+    def forget_admins(self, chat_id: int) -> None:
+        """Сбрасывает статусы администраторов чата"""
+        self._admins.pop(chat_id, None)
+    
+    @contextmanager
+    def _modify(self) -> Iterator[None]:
+        """
+        Контекст изменения хранилища: чтение, изменение и запись файла.
+        
+        Под блокировкой потоков и файловой блокировкой (fcntl.flock на
+        отдельном .lock файле) хранилище сначала перечитывается, если файл
+        изменил другой процесс, и только затем изменяется и сохраняется.
+        Иначе процесс с устаревшей копией стер бы чаты, записанные другим.
+        Без fcntl (Windows) блокируются только потоки текущего процесса.
+        """
+        with self._lock:
+            lock_file = None
+            if fcntl is not None:
+                lock_file = open(f"{self._storage_file}.lock", 'a')
+            try:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._reload_if_changed()
+                yield
+                self._save_to_file()
+            finally:
+                if lock_file is not None:
+                    # Закрытие файла снимает блокировку
+                    lock_file.close()
+    
     def _save_to_file(self) -> None:
-        """Сохраняет чаты в файл"""
+        """
+        Сохраняет чаты в файл.
+        
+        Данные записываются во временный файл в том же каталоге, который
+        затем атомарно заменяет основной (os.replace): читатели в других
+        процессах видят либо старый, либо новый файл, но не частично
+        записанный.
+        """
+        directory = os.path.dirname(os.path.abspath(self._storage_file))
+        tmp_path = None
         try:
-            with open(self._storage_file, 'w', encoding='utf-8') as f:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.chats_storage.', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(self._chats, f, ensure_ascii=False, indent=2)
-            logger.debug(f"[ChatStorage] Чаты сохранены в файл: {self._storage_file}")
+            os.replace(tmp_path, self._storage_file)
+            tmp_path = None
+            self._file_version = self._stat_version()
+            logger.debug("[ChatStorage] Чаты сохранены в файл: %s", self._storage_file)
         except Exception as e:
             logger.error(f"[ChatStorage] Ошибка при сохранении чатов в файл: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    def _stat_version(self) -> Optional[Tuple[int, int]]:
+        """
+        Возвращает версию файла хранилища.
+        
+        Returns:
+            Кортеж (inode, mtime в наносекундах) или None, если файла нет
+        """
+        try:
+            stat = os.stat(self._storage_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _reload_if_changed(self) -> None:
+        """
+        Перечитывает файл, если его изменил другой процесс.
+        
+        Веб-приложение под gunicorn работает в отдельных процессах от бота,
+        а чаты регистрирует бот. Проверка стоит один stat() на вызов.
+        """
+        version = self._stat_version()
+        if version is not None and version != self._file_version:
+            logger.debug("[ChatStorage] Файл %s изменен, перечитываем", self._storage_file)
+            self._load_from_file()
     
     def _load_from_file(self) -> None:
-        """Загружает чаты из файла"""
+        """
+        Загружает чаты из файла.
+        
+        При ошибке чтения загруженные ранее чаты сохраняются: пустое
+        хранилище было бы записано в файл при следующем изменении.
+        """
         try:
             if os.path.exists(self._storage_file):
                 with open(self._storage_file, 'r', encoding='utf-8') as f:
+                    # Версия открытого файла: замена файла после open()
+                    # будет обнаружена при следующей проверке
+                    stat = os.fstat(f.fileno())
                     loaded_chats = json.load(f)
-                    # Конвертируем ключи обратно в int
-                    self._chats = {int(k): v for k, v in loaded_chats.items()}
+                # Конвертируем ключи обратно в int
+                self._chats = {int(k): v for k, v in loaded_chats.items()}
+                self._file_version = (stat.st_ino, stat.st_mtime_ns)
                 logger.info(f"[ChatStorage] Загружено {len(self._chats)} чатов из файла: {self._storage_file}")
             else:
                 logger.info(f"[ChatStorage] Файл {self._storage_file} не найден, начинаем с пустого хранилища")
         except Exception as e:
             logger.error(f"[ChatStorage] Ошибка при загрузке чатов из файла: {e}")
-            self._chats = {}
 
 
 # Инициализируем глобальный экземпляр
@@ -1,5 +1,6 @@
 """Сервис для работы с упоминаниями участников"""
 import logging
+import re
 from typing import List, Optional
 from telegram import Bot, User
 from telegram.error import TelegramError
@@ -9,6 +10,17 @@ from bot.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Триггеры в нижнем регистре без дубликатов
+_TRIGGER_TOKENS = frozenset(trigger.lower() for trigger in Config.MENTION_TRIGGERS)
+
+# Одно регулярное выражение для всех триггеров: поиск и удаление выполняются
+# за один проход по тексту. Длинные триггеры идут первыми, чтобы альтернатива
+# не срабатывала на их префиксе. (?!\w) не дает сработать на "@allison"
+_TRIGGER_RE = re.compile(
+    '(?:' + '|'.join(re.escape(t) for t in sorted(_TRIGGER_TOKENS, key=len, reverse=True)) + r')(?!\w)',
+    re.IGNORECASE
+)
+
 
 class MentionService:
     """Сервис для обработки упоминаний участников"""
@@ -19,15 +31,15 @@ class MentionService:
     
     def extract_cleaned_text(self, text: str) -> str:
         """Удаляет триггеры упоминания из текста"""
-        cleaned = text
-        for trigger in self.config.MENTION_TRIGGERS:
-            cleaned = cleaned.replace(trigger, "").replace(trigger.lower(), "")
-        return cleaned.strip()
+        return _TRIGGER_RE.sub("", text).strip()
     
     def has_mention_trigger(self, text: str) -> bool:
         """Проверяет, содержит ли текст триггер упоминания"""
-        text_lower = text.lower()
-        return any(trigger.lower() in text_lower for trigger in self.config.MENTION_TRIGGERS)
+        # Все триггеры начинаются с '@': большинство сообщений в группах его не
+        # содержат, и для них дорогой поиск по всем триггерам не нужен
+        if '@' not in text:
+            return False
+        return _TRIGGER_RE.search(text) is not None
     
     def format_user_tags(self, users: List[User]) -> List[str]:
         """Форматирует список пользователей в теги"""
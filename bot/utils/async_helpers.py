@@ -1,21 +1,164 @@
 """Утилиты для работы с async функциями в синхронном контексте Flask"""
 import asyncio
+import concurrent.futures
+import contextvars
 import logging
-from typing import TypeVar, Callable, Coroutine, Any
+import os
+import threading
+from typing import TypeVar, Callable, Coroutine, Any, Optional, Dict, Hashable
 from functools import wraps
 
+try:
+    import uvloop  # type: ignore
+except ImportError:  # pragma: no cover - опциональная зависимость
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
 
+# Фоновый event loop, общий для всех потоков Flask. Bot и его httpx.AsyncClient
+# привязаны к loop, в котором были инициализированы, поэтому все корутины
+# должны выполняться в одном долгоживущем loop: так переиспользуется пул
+# соединений с Telegram API и не создается новый loop на каждый запрос
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Создает новый event loop.
+    
+    Если установлен uvloop (реализация на libuv), используется он: на
+    каждом await запросов к Telegram API накладные расходы самого loop
+    заметно ниже, чем у стандартного selector loop.
+    
+    Returns:
+        Новый event loop
+    """
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def install_event_loop_policy() -> None:
+    """
+    Делает uvloop loop-ом по умолчанию для asyncio, если он установлен.
+    
+    Должна вызываться до создания event loop (например, до run_polling).
+    """
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("Используется uvloop")
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Возвращает фоновый event loop, запуская его при первом обращении.
+    
+    Loop работает в отдельном daemon-потоке. После fork (воркеры gunicorn)
+    поток родителя в дочернем процессе не существует, поэтому loop
+    создается заново для каждого процесса.
+    
+    Returns:
+        Запущенный event loop
+    """
+    global _loop, _loop_thread, _loop_pid
+    
+    pid = os.getpid()
+    if _loop is not None and _loop_pid == pid:
+        return _loop
+    
+    with _loop_lock:
+        if _loop is None or _loop_pid != pid:
+            loop = new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name="async-loop",
+                daemon=True
+            )
+            thread.start()
+            _loop, _loop_thread, _loop_pid = loop, thread, pid
+            logger.debug("Запущен фоновый event loop")
+    return _loop
+
+
+def _submit_in_context(
+    coro: Coroutine[Any, Any, T],
+    loop: asyncio.AbstractEventLoop,
+    context: contextvars.Context
+) -> "concurrent.futures.Future[T]":
+    """
+    Запускает coroutine в loop как задачу с копией переданного контекста.
+    
+    run_coroutine_threadsafe создает задачу с контекстом потока loop, и
+    contextvars вызывающего потока (например, контекст запроса Flask) в
+    ней недоступны. Здесь задача создается внутри context.run, поэтому
+    наследует его переменные.
+    """
+    result: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+    
+    def on_done(task: "asyncio.Task[T]") -> None:
+        if task.cancelled():
+            result.cancel()
+        elif task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+    
+    def start() -> None:
+        if not result.set_running_or_notify_cancel():
+            coro.close()
+            return
+        task = context.run(loop.create_task, coro)
+        task.add_done_callback(on_done)
+    
+    loop.call_soon_threadsafe(start)
+    return result
+
+
+def run_async(
+    coro: Coroutine[Any, Any, T],
+    timeout: Optional[float] = None,
+    context: Optional[contextvars.Context] = None
+) -> T:
+    """
+    Выполняет coroutine в фоновом event loop и ждет результат.
+    
+    Args:
+        coro: Coroutine для выполнения
+        timeout: Максимальное время ожидания в секундах (None - без ограничения)
+        context: Контекст contextvars для задачи (None - контекст потока loop)
+        
+    Returns:
+        Результат выполнения coroutine
+        
+    Raises:
+        TimeoutError: Если coroutine не завершилась за timeout
+        Exception: Любое исключение, возникшее при выполнении coroutine
+    """
+    loop = get_background_loop()
+    if context is None:
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+    else:
+        future = _submit_in_context(coro, loop, context)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise TimeoutError("Async operation timed out")
+
+
 def run_async_safe(coro: Coroutine[Any, Any, T]) -> T:
     """
     Безопасно выполняет async функцию в синхронном контексте Flask.
     
-    Использует правильный подход для работы с event loop:
-    - Если loop уже запущен, использует asyncio.run_coroutine_threadsafe
-    - Если loop не запущен, создает новый и выполняет через asyncio.run
+    Coroutine выполняется в общем фоновом event loop (см. run_async),
+    поэтому вызов безопасен из любого потока, в том числе из потока,
+    в котором уже запущен другой loop.
     
     Args:
         coro: Coroutine для выполнения
@@ -26,60 +169,41 @@ def run_async_safe(coro: Coroutine[Any, Any, T]) -> T:
     Raises:
         Exception: Любое исключение, возникшее при выполнении coroutine
     """
-    try:
-        # Пытаемся получить текущий event loop
-        loop = asyncio.get_running_loop()
-        # Если loop уже запущен (в async контексте), это вызовет RuntimeError
-        # и мы перейдем к созданию нового loop
-    except RuntimeError:
-        # Нет запущенного loop - можем создать новый
-        try:
-            # Пытаемся получить существующий loop (может быть создан, но не запущен)
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                # Loop закрыт, создаем новый
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError:
-            # Нет loop вообще, создаем новый
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    return run_async(coro)
+
+
+# Выполняющиеся вызовы single_flight по ключу
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+
+async def single_flight(key: Hashable, func: Callable[[], Coroutine[Any, Any, T]]) -> T:
+    """
+    Объединяет одновременные одинаковые вызовы в один.
+    
+    Первый вызывающий запускает func, остальные с тем же ключом ждут его
+    результат (или исключение). Блокировка не нужна: между проверкой и
+    записью в словарь нет await, а event loop однопоточный.
+    
+    Args:
+        key: Ключ, определяющий одинаковые вызовы
+        func: Функция без аргументов, возвращающая coroutine
         
-        # Выполняем coroutine в loop
-        try:
-            return loop.run_until_complete(coro)
-        finally:
-            # НЕ закрываем loop, так как он может использоваться повторно
-            # Flask может переиспользовать поток и loop
-            pass
-    
-    # Если loop уже запущен (async контекст), используем другой подход
-    # В Flask это редко, но на всякий случай
-    import concurrent.futures
-    import threading
-    
-    # Создаем новый loop в отдельном потоке
-    future = concurrent.futures.Future()
-    
-    def run_in_thread():
-        new_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(new_loop)
-        try:
-            result = new_loop.run_until_complete(coro)
-            future.set_result(result)
-        except Exception as e:
-            future.set_exception(e)
-        finally:
-            new_loop.close()
-    
-    thread = threading.Thread(target=run_in_thread, daemon=True)
-    thread.start()
-    thread.join(timeout=30)  # Максимум 30 секунд на выполнение
-    
-    if thread.is_alive():
-        raise TimeoutError("Async operation timed out")
+    Returns:
+        Результат выполнения coroutine
+    """
+    pending = _in_flight.get(key)
+    if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+        logger.debug("Ожидание выполняющегося вызова для %s", key)
+        # shield: отмена ожидающего не должна отменять общий вызов
+        return await asyncio.shield(pending)
     
-    return future.result()
+    future = asyncio.ensure_future(func())
+    _in_flight[key] = future
+    try:
+        return await future
+    finally:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
 
 
 def async_to_sync(func: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., T]:
@@ -87,6 +211,8 @@ def async_to_sync(func: Callable[..., Coroutine[Any, Any, T]]) -> Callable[...,
     Декоратор для преобразования async функции в синхронную.
     
     Используется для Flask endpoints, которые должны вызывать async функции.
+    Coroutine выполняется в фоновом event loop с копией contextvars
+    вызывающего потока, поэтому request и g Flask доступны внутри нее.
     
     Usage:
         @app.route('/api/endpoint')
@@ -104,6 +230,6 @@ def async_to_sync(func: Callable[..., Coroutine[Any, Any, T]]) -> Callable[...,
     @wraps(func)
     def wrapper(*args, **kwargs):
         coro = func(*args, **kwargs)
-        return run_async_safe(coro)
+        return run_async(coro, context=contextvars.copy_context())
     
     return wrapper
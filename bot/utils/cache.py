@@ -1,7 +1,8 @@
 """Кэширование данных с TTL"""
+import asyncio
 import time
 import logging
-from typing import Dict, Optional, Any, Callable
+from typing import Dict, Optional, Any, Callable, Tuple, Union
 from functools import wraps
 from threading import Lock
 
@@ -10,18 +11,26 @@ logger = logging.getLogger(__name__)
 
 class CacheEntry:
     """Запись в кэше с временем истечения"""
+    __slots__ = ('value', 'expires_at')
+    
     def __init__(self, value: Any, ttl: float):
         self.value = value
-        self.expires_at = time.time() + ttl
-        self.created_at = time.time()
+        self.expires_at = time.monotonic() + ttl
     
     def is_expired(self) -> bool:
         """Проверяет, истекла ли запись"""
-        return time.time() > self.expires_at
+        return time.monotonic() > self.expires_at
 
 
 class SimpleCache:
-    """Простое in-memory кэширование с TTL"""
+    """
+    Простое in-memory кэширование с TTL.
+    
+    Чтение выполняется без блокировки: поиск в dict атомарен в CPython,
+    а записи не изменяются после создания. Блокировка берется только при
+    изменении словаря (запись, удаление, инвалидация), поэтому попадания
+    в кэш из потоков веб-сервера не ждут друг друга.
+    """
     def __init__(self):
         self._cache: Dict[str, CacheEntry] = {}
         self._lock = Lock()
@@ -36,17 +45,19 @@ class SimpleCache:
         Returns:
             Значение или None, если не найдено или истекло
         """
-        with self._lock:
-            entry = self._cache.get(key)
-            if entry is None:
-                return None
-            
-            if entry.is_expired():
-                del self._cache[key]
-                logger.debug(f"Кэш запись {key} истекла и удалена")
-                return None
-            
-            return entry.value
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        if time.monotonic() > entry.expires_at:
+            with self._lock:
+                # Запись могла быть заменена свежей, пока ждали блокировку
+                if self._cache.get(key) is entry:
+                    del self._cache[key]
+                    logger.debug("Кэш запись %s истекла и удалена", key)
+            return None
+        
+        return entry.value
     
     def set(self, key: str, value: Any, ttl: float = 300.0) -> None:
         """
@@ -59,14 +70,14 @@ class SimpleCache:
         """
         with self._lock:
             self._cache[key] = CacheEntry(value, ttl)
-            logger.debug(f"Значение сохранено в кэш: {key} (TTL: {ttl}s)")
+            logger.debug("Значение сохранено в кэш: %s (TTL: %ss)", key, ttl)
     
     def delete(self, key: str) -> None:
         """Удаляет запись из кэша"""
         with self._lock:
             if key in self._cache:
                 del self._cache[key]
-                logger.debug(f"Запись удалена из кэша: {key}")
+                logger.debug("Запись удалена из кэша: %s", key)
     
     def clear(self) -> None:
         """Очищает весь кэш"""
@@ -74,19 +85,22 @@ class SimpleCache:
             self._cache.clear()
             logger.info("Кэш полностью очищен")
     
-    def invalidate_pattern(self, pattern: str) -> None:
+    def invalidate_pattern(self, pattern: Union[str, Tuple[str, ...]]) -> None:
         """
         Инвалидирует все ключи, начинающиеся с pattern.
         
+        Несколько префиксов передаются кортежем и удаляются за один проход
+        по ключам под одной блокировкой.
+        
         Args:
-            pattern: Префикс ключей для удаления
+            pattern: Префикс ключей для удаления или кортеж префиксов
         """
         with self._lock:
             keys_to_delete = [k for k in self._cache.keys() if k.startswith(pattern)]
             for key in keys_to_delete:
                 del self._cache[key]
             if keys_to_delete:
-                logger.debug(f"Инвалидировано {len(keys_to_delete)} записей с паттерном: {pattern}")
+                logger.debug("Инвалидировано %s записей с паттерном: %s", len(keys_to_delete), pattern)
     
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику кэша"""
@@ -121,6 +135,10 @@ def cached(ttl: float = 300.0, key_func: Optional[Callable] = None):
         key_func: Функция для генерации ключа кэша (по умолчанию используется имя функции + args)
     """
     def decorator(func: Callable) -> Callable:
+        # Незавершенные вызовы по ключу кэша: одновременные промахи по одному
+        # ключу ждут один запрос, а не дублируют его (single-flight)
+        in_flight: Dict[str, asyncio.Future] = {}
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             cache = get_cache()
@@ -138,12 +156,24 @@ def cached(ttl: float = 300.0, key_func: Optional[Callable] = None):
             # Проверяем кэш
             cached_value = cache.get(cache_key)
             if cached_value is not None:
-                logger.debug(f"Кэш попадание для {cache_key}")
+                logger.debug("Кэш попадание для %s", cache_key)
                 return cached_value
             
+            # Присоединяемся к уже выполняющемуся запросу в этом же loop
+            pending = in_flight.get(cache_key)
+            if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+                logger.debug("Ожидание выполняющегося запроса для %s", cache_key)
+                return await asyncio.shield(pending)
+            
             # Выполняем функцию
-            logger.debug(f"Кэш промах для {cache_key}, выполняем функцию")
-            result = await func(*args, **kwargs)
+            logger.debug("Кэш промах для %s, выполняем функцию", cache_key)
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            in_flight[cache_key] = future
+            try:
+                result = await future
+            finally:
+                if in_flight.get(cache_key) is future:
+                    del in_flight[cache_key]
             
             # Сохраняем в кэш
             cache.set(cache_key, result, ttl)
@@ -166,11 +196,11 @@ def cached(ttl: float = 300.0, key_func: Optional[Callable] = None):
             # Проверяем кэш
             cached_value = cache.get(cache_key)
             if cached_value is not None:
-                logger.debug(f"Кэш попадание для {cache_key}")
+                logger.debug("Кэш попадание для %s", cache_key)
                 return cached_value
             
             # Выполняем функцию
-            logger.debug(f"Кэш промах для {cache_key}, выполняем функцию")
+            logger.debug("Кэш промах для %s, выполняем функцию", cache_key)
             result = func(*args, **kwargs)
             
             # Сохраняем в кэш
@@ -179,7 +209,6 @@ def cached(ttl: float = 300.0, key_func: Optional[Callable] = None):
             return result
         
         # Определяем, async или sync функция
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
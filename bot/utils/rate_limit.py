@@ -0,0 +1,141 @@
+"""Ограничение частоты исходящих запросов к Telegram Bot API"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from telegram.request import HTTPXRequest, RequestData
+
+from bot.constants import (
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_GROUP_BURST,
+    TELEGRAM_GROUP_BUCKETS_MAX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket для async кода.
+
+    Вызов acquire() резервирует токен и ждет, пока он станет доступен.
+    Резервирование выполняется под threading.Lock, а ожидание - через
+    asyncio.sleep, поэтому один bucket можно использовать из нескольких
+    event loop (loop бота и фоновый loop веб-приложения в одном процессе).
+    Порядок резервирования совпадает с порядком вызовов, поэтому
+    запросы не обгоняют друг друга.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Скорость пополнения (токенов в секунду)
+            capacity: Максимальное число токенов (размер всплеска)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Резервирует один токен.
+
+        Returns:
+            Время ожидания в секундах до того, как токен станет доступен
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Отрицательный остаток - очередь уже зарезервированных токенов
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Ждет, пока не будет доступен токен"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimitedRequest(HTTPXRequest):
+    """
+    HTTPXRequest, ограничивающий частоту запросов к Bot API.
+
+    Все вызовы bot.* проходят через do_request, поэтому ограничение
+    действует для любого метода без изменения вызывающего кода:
+    - общий лимит процесса (~30 запросов/с);
+    - для отправки сообщений в группы - лимит на чат (~20 сообщений/мин).
+
+    Всплески сглаживаются до отправки запроса, и Telegram не отвечает
+    429 RetryAfter, который останавливает все запросы на секунды и минуты.
+    Не используется для getUpdates: long polling не должен ждать очереди.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._group_buckets: "OrderedDict[Any, AsyncTokenBucket]" = OrderedDict()
+        self._group_lock = threading.Lock()
+
+    def _get_group_bucket(self, chat_id: Any) -> AsyncTokenBucket:
+        """
+        Возвращает bucket группы, вытесняя давно не использованные (LRU).
+
+        Args:
+            chat_id: ID группы
+
+        Returns:
+            Token bucket для группы
+        """
+        with self._group_lock:
+            bucket = self._group_buckets.get(chat_id)
+            if bucket is None:
+                bucket = AsyncTokenBucket(TELEGRAM_GROUP_RATE, TELEGRAM_GROUP_BURST)
+                self._group_buckets[chat_id] = bucket
+                if len(self._group_buckets) > TELEGRAM_GROUP_BUCKETS_MAX:
+                    self._group_buckets.popitem(last=False)
+            else:
+                self._group_buckets.move_to_end(chat_id)
+            return bucket
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        *args: Any,
+        **kwargs: Any
+    ) -> Tuple[int, bytes]:
+        endpoint = url.rsplit('/', 1)[-1]
+
+        # Лимит на группу касается только отправки сообщений
+        if endpoint.startswith('send') and request_data is not None:
+            chat_id = request_data.parameters.get('chat_id')
+            if isinstance(chat_id, int) and chat_id < 0:
+                await self._get_group_bucket(chat_id).acquire()
+
+        await _global_bucket.acquire()
+        return await super().do_request(url, method, request_data, *args, **kwargs)
+
+
+# Глобальный bucket процесса. Создается при импорте: он зависит только
+# от констант, поэтому ленивая инициализация с блокировкой не нужна
+_global_bucket = AsyncTokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+
+
+def get_global_bucket() -> AsyncTokenBucket:
+    """
+    Получает глобальный token bucket для запросов к Bot API.
+
+    Returns:
+        Экземпляр AsyncTokenBucket
+    """
+    return _global_bucket
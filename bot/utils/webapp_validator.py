@@ -1,109 +1,315 @@
 """Валидация данных Telegram WebApp"""
 import hmac
 import hashlib
+import json
 import logging
-from typing import Dict, Optional
-from urllib.parse import parse_qsl, unquote
-from datetime import datetime, timezone
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote_plus
 
 from bot.config import Config
+from bot.constants import WEBAPP_INIT_DATA_MAX_LENGTH
 
 logger = logging.getLogger(__name__)
 
 
-def validate_telegram_webapp_data(init_data: str) -> bool:
+@lru_cache(maxsize=1)
+def _get_secret_key(bot_token: str) -> bytes:
     """
-    Валидирует данные от Telegram WebApp через проверку подписи HMAC-SHA256.
+    Вычисляет secret_key = HMAC-SHA256("WebAppData", bot_token).
     
-    Telegram WebApp отправляет данные в формате query string:
-    user=...&auth_date=...&hash=...
+    Ключ зависит только от токена бота, поэтому вычисляется один раз
+    и переиспользуется для всех запросов.
     
-    Алгоритм валидации (согласно документации Telegram):
-    1. Извлечь hash из init_data
-    2. Создать data_check_string из всех полей кроме hash, отсортированных по ключу
-    3. Вычислить secret_key = HMAC-SHA256("WebAppData", bot_token)
-    4. Вычислить проверочный hash = HMAC-SHA256(secret_key, data_check_string)
-    5. Сравнить с полученным hash
+    Args:
+        bot_token: Токен бота
+        
+    Returns:
+        Секретный ключ для проверки подписи WebApp данных
+    """
+    return hmac.new(
+        b"WebAppData",
+        bot_token.encode('utf-8'),
+        hashlib.sha256
+    ).digest()
+
+
+# Размер блока SHA-256 в байтах (для ключевых блоков HMAC)
+_SHA256_BLOCK_SIZE = 64
+
+
+@lru_cache(maxsize=1)
+def _get_hmac_states(bot_token: str) -> Tuple[Any, Any]:
+    """
+    Создает состояния SHA-256 после обработки ключевых блоков HMAC.
     
-    Примечание: Для валидации используется BOT_TOKEN, а не WEBAPP_SECRET_KEY.
-    WEBAPP_SECRET_KEY используется только для Flask SECRET_KEY.
+    HMAC(K, m) = SHA256((K ^ opad) || SHA256((K ^ ipad) || m)). Ключевые
+    блоки зависят только от secret_key, поэтому обрабатываются один раз,
+    а для проверки подписи состояния копируются. Копирование объектов
+    hashlib выполняется в OpenSSL и дешевле, чем hmac.HMAC.copy().
+    Сами состояния не изменяются.
+    
+    Args:
+        bot_token: Токен бота
+        
+    Returns:
+        Кортеж объектов hashlib (внутреннее состояние, внешнее состояние)
+    """
+    # secret_key - 32 байта, меньше блока, поэтому дополняется нулями
+    key = _get_secret_key(bot_token).ljust(_SHA256_BLOCK_SIZE, b'\x00')
+    inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha256(bytes(b ^ 0x5c for b in key))
+    return inner, outer
+
+
+def _parse_init_data(init_data: str) -> Dict[str, str]:
+    """
+    Разбирает query string init_data в словарь за один проход.
+    
+    Эквивалент dict(parse_qsl(init_data)) без промежуточного списка пар:
+    пары без значения пропускаются, при повторе ключа побеждает последнее
+    значение.
     
     Args:
         init_data: Строка с данными от Telegram WebApp в формате query string
         
     Returns:
-        True если данные валидны, False в противном случае
+        Словарь с декодированными ключами и значениями
     """
-    if not init_data:
-        logger.warning("WebApp validation failed: empty init_data")
-        return False
+    parsed: Dict[str, str] = {}
+    for pair in init_data.split('&'):
+        key, sep, value = pair.partition('=')
+        if sep and value:
+            parsed[unquote_plus(key)] = unquote_plus(value)
+    return parsed
+
+
+def _check_signature(
+    init_data: str,
+    bot_token: str,
+    max_age: int
+) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Проверяет подпись init_data и извлекает auth_date и ID пользователя.
+    
+    Устаревшие данные отклоняются до вычисления HMAC. Данные, свежие
+    в момент проверки, со временем устаревают, поэтому вызывающий код
+    проверяет возраст при каждом вызове.
     
+    Args:
+        init_data: Строка с данными от Telegram WebApp в формате query string
+        bot_token: Токен бота
+        max_age: Максимальный возраст данных в секундах
+        
+    Returns:
+        Кортеж (auth_date, user_id) при валидной подписи, None в противном случае
+    """
     try:
         # Парсим query string
-        parsed_data = dict(parse_qsl(init_data))
+        parsed_data = _parse_init_data(init_data)
         
         # Извлекаем hash
         received_hash = parsed_data.pop('hash', None)
         if not received_hash:
             logger.warning("WebApp validation failed: hash not found in init_data")
-            return False
+            return None
         
-        # Проверяем время создания (auth_date)
+        auth_date: Optional[int] = None
         auth_date_str = parsed_data.get('auth_date')
         if auth_date_str:
             try:
-                auth_date = datetime.fromtimestamp(int(auth_date_str), tz=timezone.utc)
-                now = datetime.now(timezone.utc)
-                age_seconds = (now - auth_date).total_seconds()
-                
-                if age_seconds > Config.WEBAPP_DATA_MAX_AGE:
-                    logger.warning(
-                        f"WebApp validation failed: data too old "
-                        f"({age_seconds:.0f} seconds, max {Config.WEBAPP_DATA_MAX_AGE})"
-                    )
-                    return False
+                auth_date = int(auth_date_str)
             except (ValueError, TypeError) as e:
                 logger.warning(f"WebApp validation failed: invalid auth_date: {e}")
-                return False
+                return None
+            
+            # Устаревшие (в том числе повторно отправленные) данные
+            # отклоняем без вычисления HMAC
+            age_seconds = time.time() - auth_date
+            if age_seconds > max_age:
+                logger.warning(
+                    f"WebApp validation failed: data too old "
+                    f"({age_seconds:.0f} seconds, max {max_age})"
+                )
+                return None
         
         # Создаем data_check_string: все поля кроме hash, отсортированные по ключу
         # Формат: key=value\nkey2=value2 (отсортировано по ключу)
-        data_check_parts = []
-        for key in sorted(parsed_data.keys()):
-            value = parsed_data[key]
-            # URL decode значение
-            decoded_value = unquote(value)
-            data_check_parts.append(f"{key}={decoded_value}")
+        # Значения уже декодированы при разборе, повторный unquote исказил бы
+        # значения, содержащие символ '%'
+        data_check_string = '\n'.join(
+            f"{key}={value}" for key, value in sorted(parsed_data.items())
+        )
         
-        data_check_string = '\n'.join(data_check_parts)
-        
-        # Вычисляем secret_key = HMAC-SHA256("WebAppData", bot_token)
         # ВАЖНО: Telegram требует использовать именно токен бота для валидации WebApp данных
         # WEBAPP_SECRET_KEY используется только для Flask SECRET_KEY, не для валидации
-        secret_key = hmac.new(
-            "WebAppData".encode('utf-8'),
-            Config.TOKEN.encode('utf-8'),
-            hashlib.sha256
-        ).digest()
-        
         # Вычисляем проверочный hash = HMAC-SHA256(secret_key, data_check_string)
-        calculated_hash = hmac.new(
-            secret_key,
-            data_check_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        # на копиях состояний, в которых ключевые блоки уже обработаны
+        inner_state, outer_state = _get_hmac_states(bot_token)
+        inner = inner_state.copy()
+        inner.update(data_check_string.encode('utf-8'))
+        outer = outer_state.copy()
+        outer.update(inner.digest())
+        calculated_hash = outer.digest()
+        
+        # Полученный hash переводим в байты один раз и сравниваем с digest
+        # без промежуточных hex-строк
+        try:
+            received_digest = bytes.fromhex(received_hash)
+        except ValueError:
+            logger.warning("WebApp validation failed: hash is not a hex string")
+            return None
         
         # Сравниваем hash (constant-time comparison для безопасности)
-        if not hmac.compare_digest(calculated_hash, received_hash):
+        if not hmac.compare_digest(calculated_hash, received_digest):
             logger.warning("WebApp validation failed: hash mismatch")
-            return False
+            return None
         
-        logger.debug("WebApp validation successful")
-        return True
+        # Подпись верна - извлекаем ID пользователя
+        user_id: Optional[int] = None
+        user_json = parsed_data.get('user')
+        if user_json:
+            try:
+                user_id = int(json.loads(user_json)['id'])
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"WebApp data: не удалось извлечь ID пользователя: {e}")
+        
+        return auth_date, user_id
         
     except Exception as e:
         logger.error(f"WebApp validation error: {e}", exc_info=True)
-        return False
+        return None
+
+
+# Кэш успешных проверок подписи (LRU): (init_data, bot_token) -> результат
+_VERIFIED_CACHE_SIZE = 4096
+_verified: "OrderedDict[Tuple[str, str], Tuple[Optional[int], Optional[int]]]" = OrderedDict()
+_verified_lock = threading.Lock()
+
+
+def _verify_signature(
+    init_data: str,
+    bot_token: str,
+    max_age: int
+) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Проверяет подпись init_data с кэшированием успешных результатов.
+    
+    Повторные запросы одной сессии Mini App не разбирают строку и не
+    считают HMAC. Отказы не кэшируются: иначе произвольные строки клиента
+    вытесняли бы из кэша настоящие сессии и занимали память. Подделать
+    подпись клиент не может, поэтому кэш заполняют только данные Telegram.
+    
+    Args:
+        init_data: Строка с данными от Telegram WebApp в формате query string
+        bot_token: Токен бота
+        max_age: Максимальный возраст данных в секундах
+        
+    Returns:
+        Кортеж (auth_date, user_id) при валидной подписи, None в противном случае
+    """
+    key = (init_data, bot_token)
+    with _verified_lock:
+        verified = _verified.get(key)
+        if verified is not None:
+            _verified.move_to_end(key)
+            return verified
+    
+    verified = _check_signature(init_data, bot_token, max_age)
+    if verified is not None:
+        with _verified_lock:
+            _verified[key] = verified
+            if len(_verified) > _VERIFIED_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return verified
+
+
+def _authenticate(init_data: str) -> Tuple[bool, Optional[int]]:
+    """
+    Проверяет подпись и время жизни init_data.
+    
+    Args:
+        init_data: Строка с данными от Telegram WebApp
+        
+    Returns:
+        Кортеж (данные валидны, ID пользователя или None)
+    """
+    if not init_data:
+        logger.warning("WebApp validation failed: empty init_data")
+        return False, None
+    if len(init_data) > WEBAPP_INIT_DATA_MAX_LENGTH:
+        logger.warning("WebApp validation failed: init_data too long (%s)", len(init_data))
+        return False, None
+    
+    verified = _verify_signature(init_data, Config.TOKEN, Config.WEBAPP_DATA_MAX_AGE)
+    if verified is None:
+        return False, None
+    auth_date, user_id = verified
+    
+    # Проверяем время создания (auth_date): данные из кэша подписи могли
+    # устареть после проверки. auth_date - Unix-время, поэтому возраст
+    # считается вычитанием без построения объектов datetime
+    if auth_date is not None:
+        age_seconds = time.time() - auth_date
+        if age_seconds > Config.WEBAPP_DATA_MAX_AGE:
+            logger.warning(
+                f"WebApp validation failed: data too old "
+                f"({age_seconds:.0f} seconds, max {Config.WEBAPP_DATA_MAX_AGE})"
+            )
+            return False, None
+    
+    logger.debug("WebApp validation successful")
+    return True, user_id
+
+
+def validate_telegram_webapp_data(init_data: str) -> bool:
+    """
+    Валидирует данные от Telegram WebApp через проверку подписи HMAC-SHA256.
+    
+    Telegram WebApp отправляет данные в формате query string:
+    user=...&auth_date=...&hash=...
+    
+    Алгоритм валидации (согласно документации Telegram):
+    1. Извлечь hash из init_data
+    2. Создать data_check_string из всех полей кроме hash, отсортированных по ключу
+    3. Вычислить secret_key = HMAC-SHA256("WebAppData", bot_token)
+    4. Вычислить проверочный hash = HMAC-SHA256(secret_key, data_check_string)
+    5. Сравнить с полученным hash
+    
+    Результат проверки подписи кэшируется по строке init_data, время жизни
+    данных (auth_date) проверяется при каждом вызове.
+    
+    Примечание: Для валидации используется BOT_TOKEN, а не WEBAPP_SECRET_KEY.
+    WEBAPP_SECRET_KEY используется только для Flask SECRET_KEY.
+    
+    Args:
+        init_data: Строка с данными от Telegram WebApp в формате query string
+        
+    Returns:
+        True если данные валидны, False в противном случае
+    """
+    is_valid, _ = _authenticate(init_data)
+    return is_valid
+
+
+def get_webapp_user_id(init_data: str) -> Optional[int]:
+    """
+    Возвращает ID пользователя из проверенных данных Telegram WebApp.
+    
+    В отличие от user_id из тела запроса, это значение подписано Telegram
+    и не может быть подменено клиентом.
+    
+    Args:
+        init_data: Строка с данными от Telegram WebApp в формате query string
+        
+    Returns:
+        ID пользователя или None, если данные невалидны или не содержат user
+    """
+    _, user_id = _authenticate(init_data)
+    return user_id
 
 
 def parse_webapp_data(init_data: str) -> Optional[Dict]:
@@ -120,13 +326,12 @@ def parse_webapp_data(init_data: str) -> Optional[Dict]:
         return None
     
     try:
-        parsed_data = dict(parse_qsl(init_data))
+        parsed_data = _parse_init_data(init_data)
         # Убираем hash из результата
         parsed_data.pop('hash', None)
         
         # Парсим JSON поля если есть
         if 'user' in parsed_data:
-            import json
             try:
                 parsed_data['user'] = json.loads(parsed_data['user'])
             except json.JSONDecodeError:
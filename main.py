@@ -14,6 +14,9 @@ from bot.handlers.commands import (
 )
 from bot.handlers.messages import handle_text_message
 from bot.handlers.chat_events import handle_chat_member_update, handle_my_chat_member_update
+from bot.services.chat_storage_service import chat_storage
+from bot.utils.async_helpers import install_event_loop_policy
+from bot.utils.rate_limit import RateLimitedRequest
 
 # Настройка логирования
 if Config.LOG_JSON:
@@ -79,12 +82,20 @@ def main() -> None:
         return
     
     # Запускаем веб-сервер в отдельном потоке
-    webapp_thread = threading.Thread(target=run_webapp, daemon=True)
-    webapp_thread.start()
-    logger.info("Веб-сервер запущен в фоновом режиме")
+    # В продакшене веб-приложение работает отдельным процессом под gunicorn
+    if Config.WEBAPP_EMBEDDED:
+        webapp_thread = threading.Thread(target=run_webapp, daemon=True)
+        webapp_thread.start()
+        logger.info("Веб-сервер запущен в фоновом режиме")
+    else:
+        logger.info("Встроенный веб-сервер отключен (WEBAPP_EMBEDDED=false), запустите: python -m webapp.server")
     
     # Создаем приложение
-    application = Application.builder().token(Config.TOKEN).build()
+    # Запросы к Bot API (кроме getUpdates) проходят через ограничитель частоты
+    builder = Application.builder().token(Config.TOKEN).request(RateLimitedRequest())
+    if Config.TELEGRAM_API_URL:
+        builder = builder.base_url(Config.TELEGRAM_API_URL)
+    application = builder.build()
     
     # Регистрируем обработчики
     application.add_handler(CommandHandler("start", start_command))
@@ -104,7 +115,11 @@ def main() -> None:
     application.add_handler(ChatMemberHandler(handle_chat_member_update, ChatMemberHandler.CHAT_MEMBER))
     application.add_handler(ChatMemberHandler(handle_my_chat_member_update, ChatMemberHandler.MY_CHAT_MEMBER))
     
-    # Запускаем бота
+    # Статусы администраторов поддерживаются событиями chat_member/my_chat_member
+    chat_storage.enable_admin_tracking()
+    
+    # Запускаем бота (в uvloop, если он установлен)
+    install_event_loop_policy()
     logger.info("Бот запущен и готов к работе...")
     logger.info(f"Mini App доступен по адресу: {Config.WEBAPP_URL}")
     application.run_polling(
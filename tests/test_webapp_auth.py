@@ -0,0 +1,77 @@
+"""Проверка init_data в endpoints участников и удаления чата"""
+import hashlib
+import hmac
+import json
+import os
+import time
+from urllib.parse import urlencode
+
+import pytest
+
+os.environ.setdefault('BOT_TOKEN', '123456:test-token')
+
+from bot.config import Config  # noqa: E402
+from webapp.app import app  # noqa: E402
+
+CHAT_ID = -100123
+USER_ID = 42
+
+
+def make_init_data(user_id: int) -> str:
+    """
+    Формирует init_data, подписанные токеном бота, как это делает Telegram.
+
+    Args:
+        user_id: ID пользователя в поле user
+
+    Returns:
+        Строка init_data в формате query string
+    """
+    fields = {
+        'auth_date': str(int(time.time())),
+        'user': json.dumps({'id': user_id, 'first_name': 'Test'}),
+    }
+    data_check_string = '\n'.join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", Config.TOKEN.encode('utf-8'), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret_key, data_check_string.encode('utf-8'), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def forge_init_data(user_id: int) -> str:
+    """Подменяет ID пользователя в подписанных init_data другого пользователя"""
+    return make_init_data(user_id + 1).replace(str(user_id + 1), str(user_id), 1)
+
+
+@pytest.fixture
+def client():
+    app.config['RATELIMIT_ENABLED'] = False
+    with app.test_client() as test_client:
+        yield test_client
+
+
+@pytest.fixture(params=['members', 'delete'])
+def send(request, client):
+    """Отправляет запрос к одному из защищенных endpoints"""
+    def _send(body):
+        if request.param == 'members':
+            return client.post(f'/api/chats/{CHAT_ID}/members', json=body)
+        return client.delete(f'/api/chats/{CHAT_ID}', json=body)
+    return _send
+
+
+def test_missing_init_data_is_rejected(send):
+    response = send({'user_id': USER_ID})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_forged_init_data_is_rejected(send):
+    response = send({'user_id': USER_ID, 'init_data': forge_init_data(USER_ID)})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Невалидные данные WebApp'
+
+
+def test_user_id_must_match_init_data(send):
+    response = send({'user_id': USER_ID, 'init_data': make_init_data(USER_ID + 1)})
+    assert response.status_code == 403
+    assert response.get_json()['error'] == 'user_id не совпадает с данными WebApp'
@@ -1,26 +1,38 @@
 """Flask приложение для Mini App"""
+import asyncio
+import atexit
+import contextvars
+import hashlib
+import inspect
 import logging
+import os
 import time
-import json
-from typing import Optional, Dict, Any
-from functools import wraps
-from flask import Flask, render_template, request, jsonify
+from collections import Counter, deque
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple, Union
+from functools import partial, wraps
+from operator import attrgetter
+import orjson
+from flask import Flask, Response, render_template, request
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
 from telegram.error import TelegramError
 from pydantic import ValidationError
+from werkzeug.exceptions import HTTPException
 
 from bot.config import Config
+from bot.constants import ADMIN_STATUSES, GROUP_CHAT_TYPES, WEBAPP_INIT_DATA_MAX_LENGTH
+from bot.models.chat import ChatRow
 from bot.services.chat_storage_service import chat_storage
-from bot.infrastructure.telegram_client import get_telegram_client
-from bot.utils.webapp_validator import validate_telegram_webapp_data, parse_webapp_data
+from bot.infrastructure.telegram_client import close_telegram_client, get_chat_service, get_telegram_client
+from bot.utils.webapp_validator import get_webapp_user_id, parse_webapp_data
 from bot.utils.errors import handle_telegram_error, get_user_friendly_message
 from bot.utils.retry import retry_async, RetryConfig
 from bot.utils.cache import get_cache
-from bot.utils.async_helpers import run_async_safe
-from bot.utils.batching import batch_process_with_filter
-from webapp.validators import ChatListRequest, ChatMembersRequest, validate_chat_id
+from bot.utils.async_helpers import async_to_sync, run_async, single_flight
+from bot.utils.batching import batch_process
+from webapp.validators import ChatDeleteRequest, ChatIdConverter, ChatListRequest, ChatMembersRequest
 
 try:
     import sass  # type: ignore
@@ -29,14 +41,55 @@ except ImportError:  # pragma: no cover - опциональная зависи
 
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON провайдер Flask на основе orjson.
+    
+    Через него разбирается тело запросов (request.get_json) и сериализуются
+    ответы jsonify, в том числе ответы расширений Flask.
+    """
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_SORT_KEYS if kwargs.get('sort_keys', self.sort_keys) else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+class MiniAppFlask(Flask):
+    """
+    Flask приложение, выполняющее async views в общем фоновом event loop.
+    
+    По умолчанию Flask запускает каждую async view в отдельном loop через
+    asgiref, а Bot и его пул соединений привязаны к одному loop.
+    """
+    
+    json_provider_class = ORJSONProvider
+    
+    def async_to_sync(self, func):
+        return async_to_sync(func)
+
+
+app = MiniAppFlask(__name__)
 app.config['SECRET_KEY'] = Config.WEBAPP_SECRET_KEY
+# Тела запросов API - небольшой JSON с init_data. Ограничение действует и
+# для ключа rate limiting, который читает тело до проверки лимита:
+# более длинные тела отклоняются с 413 без чтения
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024
+app.url_map.converters['chat_id'] = ChatIdConverter
 
 
 def _compile_scss() -> None:
     """
     Компилирует SCSS в CSS при старте приложения.
     Если libsass недоступен, просто логируем предупреждение.
+    
+    Компиляция пропускается, если style.css новее всех .scss файлов:
+    перезапуск процесса и старт каждого воркера gunicorn не вызывают
+    libsass повторно. Результат записывается во временный файл и
+    переименовывается, поэтому другие процессы не читают CSS частично.
     """
     if sass is None:
         logger.warning("SCSS не скомпилирован: пакет 'libsass' не установлен")
@@ -50,12 +103,20 @@ def _compile_scss() -> None:
         scss_path = scss_dir / "style.scss"
         css_path = base_dir / "static" / "css" / "style.css"
 
+        if css_path.exists():
+            css_mtime = css_path.stat().st_mtime
+            if all(path.stat().st_mtime <= css_mtime for path in scss_dir.rglob("*.scss")):
+                logger.debug("SCSS не изменился, компиляция пропущена")
+                return
+
         # libsass требует include_paths для правильной работы @import
         css = sass.compile(
             filename=str(scss_path),
             include_paths=[str(scss_dir)]
         )
-        css_path.write_text(css, encoding="utf-8")
+        tmp_path = css_path.with_name(f"{css_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(css, encoding="utf-8")
+        os.replace(tmp_path, css_path)
         logger.info(f"SCSS успешно скомпилирован в {css_path}")
     except Exception as e:  # pragma: no cover - защитный код
         logger.error(f"Ошибка компиляции SCSS: {e}", exc_info=True)
@@ -63,50 +124,85 @@ def _compile_scss() -> None:
 
 _compile_scss()
 
-# Метрики производительности
+class MetricRecord(NamedTuple):
+    """
+    Запись метрики одного вызова endpoint.
+    
+    Кортеж вместо словаря: запись меньше и создается быстрее, а в буфере
+    их хранится до 1000.
+    """
+    endpoint: str
+    response_time_ns: int
+    timestamp: float
+    status: str
+    error: Optional[str] = None
+
+
+# Метрики производительности. Хранятся только последние 1000 записей:
+# deque с maxlen вытесняет старые записи без копирования списка
 _metrics = {
     'api_requests': {},
-    'api_response_times': []
+    'api_response_times': deque(maxlen=1000)
 }
 
+def _record_metric(endpoint_name: str, start_ns: int, error: Optional[Exception] = None) -> None:
+    """
+    Сохраняет метрику одного вызова endpoint.
+    
+    Args:
+        endpoint_name: Имя endpoint
+        start_ns: Значение time.perf_counter_ns() в начале вызова
+        error: Исключение, если вызов завершился ошибкой
+    """
+    # Длительность - по монотонным часам в целых наносекундах (без
+    # промежуточных float), timestamp записи - по системным. В секунды
+    # длительность переводится только при логировании и в /api/metrics
+    response_time_ns = time.perf_counter_ns() - start_ns
+    
+    if error is not None:
+        _metrics['api_response_times'].append(
+            MetricRecord(endpoint_name, response_time_ns, time.time(), 'error', str(error))
+        )
+        return
+    
+    # Обновляем метрики
+    if endpoint_name not in _metrics['api_requests']:
+        _metrics['api_requests'][endpoint_name] = 0
+    _metrics['api_requests'][endpoint_name] += 1
+    
+    _metrics['api_response_times'].append(
+        MetricRecord(endpoint_name, response_time_ns, time.time(), 'success')
+    )
+    
+    logger.debug("[Metrics] %s: %.3fs", endpoint_name, response_time_ns / 1e9)
+
+
 def track_metrics(endpoint_name: str):
-    """Декоратор для отслеживания метрик производительности"""
+    """Декоратор для отслеживания метрик производительности (sync и async views)"""
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    _record_metric(endpoint_name, start_ns, e)
+                    raise
+                _record_metric(endpoint_name, start_ns)
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                response_time = time.time() - start_time
-                
-                # Обновляем метрики
-                if endpoint_name not in _metrics['api_requests']:
-                    _metrics['api_requests'][endpoint_name] = 0
-                _metrics['api_requests'][endpoint_name] += 1
-                
-                _metrics['api_response_times'].append({
-                    'endpoint': endpoint_name,
-                    'response_time': response_time,
-                    'timestamp': time.time(),
-                    'status': 'success'
-                })
-                
-                # Храним только последние 1000 записей
-                if len(_metrics['api_response_times']) > 1000:
-                    _metrics['api_response_times'] = _metrics['api_response_times'][-1000:]
-                
-                logger.debug(f"[Metrics] {endpoint_name}: {response_time:.3f}s")
-                return result
             except Exception as e:
-                response_time = time.time() - start_time
-                _metrics['api_response_times'].append({
-                    'endpoint': endpoint_name,
-                    'response_time': response_time,
-                    'timestamp': time.time(),
-                    'status': 'error',
-                    'error': str(e)
-                })
+                _record_metric(endpoint_name, start_ns, e)
                 raise
+            _record_metric(endpoint_name, start_ns)
+            return result
         return wrapper
     return decorator
 
@@ -119,65 +215,209 @@ CORS(app, resources={
     }
 })
 
+def get_rate_limit_key() -> str:
+    """
+    Возвращает ключ для rate limiting.
+    
+    Лимиты считаются по пользователю из подписанных init_data: пользователи
+    за одним NAT не делят лимит, а смена IP не обходит его. Проверка подписи
+    кэшируется, поэтому повторная проверка во view бесплатна. Для запросов
+    без валидных init_data используется IP клиента; слишком длинные
+    init_data не проверяются.
+    
+    Returns:
+        Ключ вида "user:<id>" или IP адрес клиента
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        init_data = data.get('init_data')
+        if (
+            init_data and isinstance(init_data, str)
+            and len(init_data) <= WEBAPP_INIT_DATA_MAX_LENGTH
+        ):
+            user_id = get_webapp_user_id(init_data)
+            if user_id is not None:
+                return f"user:{user_id}"
+    return get_remote_address()
+
+
 # Настройка Rate Limiting
 limiter = Limiter(
     app=app,
-    key_func=get_remote_address,
+    key_func=get_rate_limit_key,
     default_limits=["200 per day", "50 per hour"],
+    # Два счетчика на ключ (текущее и предыдущее окно) с взвешиванием:
+    # памяти почти как у fixed-window, но без двойного всплеска на границе окон
+    strategy="sliding-window-counter",
     storage_uri="memory://"  # In-memory storage (можно заменить на Redis)
 )
 
-# Версия для cache busting
-APP_VERSION = str(int(time.time()))
+# Максимум одновременно обрабатываемых чатов в /api/chats.
+# На каждый чат приходится до трех запросов к Telegram API
+CHAT_FETCH_CONCURRENCY = 16
+
+# Время жизни кэша списка чатов (секунды)
+CHATS_CACHE_TTL = 300.0
+
+# Интервал фонового обновления списков чатов активных пользователей (секунды)
+CHATS_REFRESH_INTERVAL = 60.0
+
+# Сколько пользователь считается активным после последнего запроса (секунды)
+CHATS_ACTIVE_WINDOW = 600.0
+
+# Время жизни кэша списка участников (секунды): участники меняются реже
+MEMBERS_CACHE_TTL = 900.0
+
+# Поля сортировки списка чатов
+CHAT_SORT_FIELDS = ('title', 'members_count', 'type')
+
+def _compute_static_version() -> str:
+    """
+    Вычисляет версию статики для cache busting по содержимому файлов.
+    
+    Версия меняется только вместе с CSS/JS: перезапуск процесса или
+    несколько воркеров с одной сборкой дают одинаковые URL, и браузеры
+    продолжают использовать закэшированные файлы.
+    
+    Returns:
+        Первые 12 символов хэша содержимого статических файлов
+    """
+    static_dir = os.path.join(app.root_path, 'static')
+    digest = hashlib.blake2b(digest_size=16)
+    for subdir in ('css', 'js'):
+        directory = os.path.join(static_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                digest.update(name.encode('utf-8'))
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+# Версия для cache busting (после компиляции SCSS: учитывает итоговый CSS)
+APP_VERSION = _compute_static_version()
+
+
+def json_response(payload: Union[Dict[str, Any], bytes], status: int = 200) -> Response:
+    """
+    Формирует JSON ответ, сериализуя данные через orjson.
+    
+    orjson работает значительно быстрее стандартного json, что заметно
+    на больших списках чатов и участников. Уже сериализованный ответ
+    (bytes из кэша) отдается как есть.
+    
+    Args:
+        payload: Данные для сериализации или готовое JSON тело
+        status: HTTP статус ответа
+        
+    Returns:
+        Flask Response с Content-Type application/json
+    """
+    body = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+
+def mark_stale_body(body: bytes, warning: str) -> bytes:
+    """
+    Добавляет в сериализованный JSON объект признак устаревших данных.
+    
+    Поля дописываются перед закрывающей скобкой, поэтому кэшированное
+    тело не разбирается и не сериализуется заново.
+    
+    Args:
+        body: JSON объект, сериализованный orjson
+        warning: Текст предупреждения
+        
+    Returns:
+        JSON тело с полями cached и warning
+    """
+    return body[:-1] + b',"cached":true,"warning":' + orjson.dumps(warning) + b'}'
+
+
+def etag_json_response(body: bytes) -> Response:
+    """
+    Формирует JSON ответ с ETag.
+    
+    Если клиент прислал совпадающий If-None-Match, возвращается 304 без
+    тела: данные не передаются повторно и не разбираются на клиенте.
+    make_conditional Flask работает только для GET/HEAD, а API Mini App
+    использует POST, поэтому проверка выполняется здесь.
+    
+    Args:
+        body: JSON тело ответа, сериализованное orjson
+        
+    Returns:
+        Flask Response со статусом 200 или 304
+    """
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    return response
+
 
 # TelegramClient теперь управляется через get_telegram_client()
 # Удалено: глобальный Bot экземпляр заменен на TelegramClient
 
 
+@atexit.register
+def _close_telegram_client() -> None:
+    """Закрывает соединения общего Bot с Telegram API при завершении процесса"""
+    try:
+        run_async(close_telegram_client(), timeout=5.0)
+    except Exception as e:
+        logger.debug("Не удалось остановить TelegramClient: %s", e)
+
+
+
+
+# Отрендеренные страницы по (шаблон, script_root). Шаблоны зависят только от
+# APP_VERSION и URL статики, поэтому результат постоянен для процесса
+_RENDERED_PAGES: Dict[Tuple[str, str], bytes] = {}
+
+
+def render_page(template: str) -> Response:
+    """
+    Возвращает HTML страницу, отрендеренную один раз за процесс.
+    
+    Args:
+        template: Имя шаблона
+        
+    Returns:
+        Flask Response с готовым HTML
+    """
+    key = (template, request.script_root)
+    html = _RENDERED_PAGES.get(key)
+    if html is None:
+        html = render_template(template, version=APP_VERSION).encode('utf-8')
+        _RENDERED_PAGES[key] = html
+    return app.response_class(html, mimetype='text/html')
 
 
 @app.route('/')
 def index():
     """Главная страница Mini App"""
-    return render_template('index.html', version=APP_VERSION)
+    return render_page('index.html')
 
 
 @app.route('/members')
 def members_page():
     """Страница участников чата"""
-    logger.info("[API] GET /members - запрос страницы участников")
-    return render_template('members.html', version=APP_VERSION)
+    logger.debug("[API] GET /members - запрос страницы участников")
+    return render_page('members.html')
 
 
-@app.after_request
-def add_security_headers(response):
-    """
-    Добавляет security headers и заголовки для предотвращения кэширования.
-    Также устанавливает правильные MIME-типы для статических файлов.
-    
-    Security headers:
-    - Content-Security-Policy: ограничивает источники контента
-    - X-Frame-Options: предотвращает clickjacking
-    - X-Content-Type-Options: предотвращает MIME-sniffing
-    - Referrer-Policy: контролирует передачу referrer
-    - Permissions-Policy: ограничивает доступ к API браузера
-    """
-    # Устанавливаем правильный Content-Type для статических файлов
-    if request.endpoint == 'static':
-        path = request.path.lower()
-        # Принудительно устанавливаем правильный MIME-тип
-        if path.endswith('.js'):
-            response.headers['Content-Type'] = 'application/javascript; charset=utf-8'
-            # Убираем nosniff для JS файлов, чтобы браузер не блокировал их
-            # Но оставляем для безопасности других файлов
-        elif path.endswith('.css'):
-            response.headers['Content-Type'] = 'text/css; charset=utf-8'
-        elif path.endswith('.json'):
-            response.headers['Content-Type'] = 'application/json; charset=utf-8'
-    
-    # Security headers для всех ответов
+# Security headers для всех ответов. Собираются один раз при импорте
+# и применяются одним вызовом update в after_request
+SECURITY_HEADERS = {
     # CSP для Telegram WebApp - разрешаем только необходимые источники
-    csp_policy = (
+    'Content-Security-Policy': (
         "default-src 'self'; "
         "script-src 'self' 'unsafe-inline' https://telegram.org https://unpkg.com; "
         "style-src 'self' 'unsafe-inline'; "
@@ -190,98 +430,567 @@ def add_security_headers(response):
         "form-action 'self'; "
         "frame-ancestors 'self' https://telegram.org; "
         "upgrade-insecure-requests;"
-    )
-    response.headers['Content-Security-Policy'] = csp_policy
-    
+    ),
     # Предотвращение clickjacking
-    response.headers['X-Frame-Options'] = 'SAMEORIGIN'
-    
-    # Предотвращение MIME-sniffing (но не для статических JS/CSS файлов с правильным типом)
-    # Для статических JS/CSS файлов мы уже установили правильный Content-Type выше
-    if request.endpoint != 'static' or not (request.path.lower().endswith(('.js', '.css'))):
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-    
+    'X-Frame-Options': 'SAMEORIGIN',
     # Контроль referrer
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
     # Permissions Policy (ограничение доступа к API браузера)
-    response.headers['Permissions-Policy'] = (
+    'Permissions-Policy': (
         'geolocation=(), '
         'microphone=(), '
         'camera=(), '
         'payment=(), '
         'usb=()'
-    )
+    ),
+}
+
+# Правильные MIME-типы статических файлов по расширению
+STATIC_CONTENT_TYPES = {
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.json': 'application/json; charset=utf-8',
+}
+
+# Заголовки кэширования
+VERSIONED_STATIC_CACHE_HEADERS = {'Cache-Control': 'public, max-age=31536000'}  # 1 год
+NO_STORE_CACHE_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+}
+API_CACHE_HEADERS = {'Cache-Control': 'no-cache, must-revalidate'}
+
+
+@app.after_request
+def add_security_headers(response):
+    """
+    Добавляет security headers и заголовки для предотвращения кэширования.
+    Также устанавливает правильные MIME-типы для статических файлов.
     
-    # Заголовки для предотвращения кэширования (только для HTML страниц)
-    if request.endpoint == 'static' or request.endpoint == 'index' or request.endpoint == 'members_page':
+    Security headers:
+    - Content-Security-Policy: ограничивает источники контента
+    - X-Frame-Options: предотвращает clickjacking
+    - X-Content-Type-Options: предотвращает MIME-sniffing
+    - Referrer-Policy: контролирует передачу referrer
+    - Permissions-Policy: ограничивает доступ к API браузера
+    """
+    endpoint = request.endpoint
+    headers = response.headers
+    headers.update(SECURITY_HEADERS)
+    
+    if endpoint == 'static':
+        # Принудительно устанавливаем правильный MIME-тип
+        extension = os.path.splitext(request.path)[1].lower()
+        content_type = STATIC_CONTENT_TYPES.get(extension)
+        if content_type is not None:
+            headers['Content-Type'] = content_type
+        # Предотвращение MIME-sniffing: для JS/CSS тип уже установлен выше,
+        # nosniff не ставим, чтобы браузер не блокировал их
+        if extension not in ('.js', '.css'):
+            headers['X-Content-Type-Options'] = 'nosniff'
+        
         # Для версионированных статических файлов - длительное кэширование
-        if request.endpoint == 'static' and ('?v=' in request.url or '?version=' in request.url):
-            response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 год
+        if 'v' in request.args or 'version' in request.args:
+            headers.update(VERSIONED_STATIC_CACHE_HEADERS)
         else:
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
+            headers.update(NO_STORE_CACHE_HEADERS)
     else:
-        # Для API endpoints - короткое кэширование
-        response.headers['Cache-Control'] = 'no-cache, must-revalidate'
+        headers['X-Content-Type-Options'] = 'nosniff'
+        # Заголовки для предотвращения кэширования (только для HTML страниц)
+        if endpoint == 'index' or endpoint == 'members_page':
+            headers.update(NO_STORE_CACHE_HEADERS)
+        else:
+            # Для API endpoints - короткое кэширование
+            headers.update(API_CACHE_HEADERS)
     
     return response
 
 
-@app.errorhandler(429)
-def handle_rate_limit(e):
-    """Обработчик ошибок rate limiting"""
-    logger.warning(f"Rate limit exceeded: {e}")
-    return jsonify({
-        'success': False,
-        'error': 'Превышен лимит запросов. Попробуйте позже.'
-    }), 429
+# Неизменные тела ответов об ошибках сериализуются один раз при импорте
+RATE_LIMIT_ERROR_BODY = orjson.dumps({
+    'success': False,
+    'error': 'Превышен лимит запросов. Попробуйте позже.'
+})
+NOT_FOUND_ERROR_BODY = orjson.dumps({
+    'success': False,
+    'error': 'Endpoint не найден'
+})
+INTERNAL_ERROR_BODY = orjson.dumps({
+    'success': False,
+    'error': 'Внутренняя ошибка сервера'
+})
+# Страница 404 для не-API путей статична: не рендерится и не содержит
+# путь запроса (сканеры перебирают пути, а путь в HTML - отраженный XSS)
+NOT_FOUND_PAGE_BODY = (
+    '<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8">'
+    '<title>404</title></head><body><p>Страница не найдена</p></body></html>'
+).encode('utf-8')
 
 
 @app.errorhandler(ValidationError)
 def handle_validation_error(e: ValidationError):
     """Обработчик ошибок валидации pydantic"""
     logger.warning(f"Validation error: {e}")
-    return jsonify({
+    return json_response({
         'success': False,
         'error': 'Ошибка валидации данных',
         'details': [{'field': error.get('loc', []), 'message': str(error.get('msg', '')), 'type': error.get('type', '')} for error in e.errors()]
-    }), 400
+    }, 400)
 
 
-@app.errorhandler(404)
-def handle_not_found(e):
-    """Обработчик 404 ошибок"""
-    # Для API endpoints возвращаем JSON
-    if request.path.startswith('/api/'):
-        return jsonify({
-            'success': False,
-            'error': 'Endpoint не найден'
-        }), 404
-    # Для остальных - стандартная обработка Flask
-    return f"Страница не найдена: {request.path}", 404
+# JSON тела ответов API по коду HTTP ошибки
+HTTP_ERROR_BODIES = {
+    404: NOT_FOUND_ERROR_BODY,
+    429: RATE_LIMIT_ERROR_BODY
+}
+
+
+@app.errorhandler(HTTPException)
+def handle_http_exception(e: HTTPException):
+    """
+    Единый обработчик HTTP ошибок (404, 405, 429 и т.д.).
+    
+    Для API endpoints возвращает JSON, для страниц - HTML. Превышение
+    лимита запросов всегда возвращается в JSON: лимиты действуют только
+    на API.
+    """
+    code = e.code or 500
+    logger.log(
+        logging.ERROR if code >= 500 else logging.WARNING,
+        "HTTP %s: %s %s", code, request.method, request.path
+    )
+    if code == 429 or request.path.startswith('/api/'):
+        body = HTTP_ERROR_BODIES.get(code)
+        if body is None:
+            body = orjson.dumps({'success': False, 'error': e.description})
+        return json_response(body, code)
+    if code == 404:
+        return Response(NOT_FOUND_PAGE_BODY, 404, mimetype='text/html')
+    # Для остальных - стандартная страница Werkzeug
+    return e
 
 
 @app.errorhandler(Exception)
 def handle_exception(e: Exception):
     """Глобальный обработчик исключений"""
-    # Пропускаем 404 ошибки - они обрабатываются отдельно
-    from werkzeug.exceptions import NotFound
-    if isinstance(e, NotFound):
-        raise  # Пробрасываем дальше для обработки handle_not_found
-    
+    # HTTP ошибки сюда не попадают: Flask выбирает более точный
+    # обработчик handle_http_exception
     logger.error(f"Необработанное исключение: {e}", exc_info=True)
-    return jsonify({
-        'success': False,
-        'error': 'Внутренняя ошибка сервера'
-    }), 500
+    return json_response(INTERNAL_ERROR_BODY, 500)
+
+
+def sort_chats(chats: List[ChatRow], sort_by: str, sort_order: str) -> None:
+    """
+    Сортирует список чатов на месте.
+    
+    Args:
+        chats: Список чатов
+        sort_by: Поле сортировки (title, members_count, type)
+        sort_order: Направление сортировки (asc, desc)
+    """
+    if sort_by == 'title':
+        # title_lc (casefold) вычисляется один раз при создании ChatRow
+        chats.sort(key=attrgetter('title_lc'), reverse=(sort_order == 'desc'))
+    elif sort_by == 'members_count':
+        chats.sort(key=lambda x: x.members_count or 0, reverse=(sort_order == 'desc'))
+    elif sort_by == 'type':
+        # attrgetter реализован на C и не создает Python-фрейм на каждый элемент
+        chats.sort(key=attrgetter('type'), reverse=(sort_order == 'desc'))
+    else:
+        # По умолчанию по названию
+        chats.sort(key=attrgetter('title_lc'))
+
+
+def paginate_chats(
+    chats: List[ChatRow],
+    page: int,
+    per_page: int
+) -> Tuple[List[ChatRow], Dict[str, Any]]:
+    """
+    Возвращает страницу чатов и метаданные пагинации.
+    
+    Args:
+        chats: Полный отсортированный список чатов
+        page: Номер страницы (начинается с 1)
+        per_page: Количество чатов на странице
+        
+    Returns:
+        Кортеж (чаты текущей страницы, метаданные пагинации)
+    """
+    total_chats = len(chats)
+    total_pages = (total_chats + per_page - 1) // per_page if total_chats > 0 else 1
+    
+    # Проверяем, что запрошенная страница существует
+    if page > total_pages and total_pages > 0:
+        page = total_pages
+    
+    start_idx = (page - 1) * per_page
+    pagination = {
+        'page': page,
+        'per_page': per_page,
+        'total': total_chats,
+        'total_pages': total_pages,
+        'has_next': page < total_pages,
+        'has_prev': page > 1
+    }
+    return chats[start_idx:start_idx + per_page], pagination
+
+
+def chats_cache_key(user_id: int, offset: int, limit: Optional[int]) -> str:
+    """
+    Возвращает ключ кэша списка чатов пользователя.
+    
+    Args:
+        user_id: ID пользователя
+        offset: Начало окна хранилища
+        limit: Размер окна хранилища или None для всего хранилища
+        
+    Returns:
+        Ключ кэша
+    """
+    if limit is None:
+        return f"chats:{user_id}"
+    return f"chats:{user_id}:{offset}:{limit}"
+
+
+async def fetch_user_chats(
+    user_id: int,
+    stored_chats: List[Dict[str, Any]]
+) -> Tuple[List[ChatRow], int, int, int]:
+    """
+    Проверяет чаты хранилища через Telegram API.
+    
+    Args:
+        user_id: ID пользователя, для которого отбираются чаты
+        stored_chats: Чаты хранилища для проверки
+        
+    Returns:
+        Кортеж (чаты пользователя, пропущено не групп,
+        пропущено без прав бота, пропущено без прав создателя)
+    """
+    # ID чата -> запись хранилища. Словарь убирает дубликаты, сохраняя
+    # порядок хранилища
+    all_chat_ids = {stored_chat['id']: stored_chat for stored_chat in stored_chats}
+    filtered_chats = []
+    skipped_not_admin = 0
+    skipped_not_creator = 0
+    skipped_not_group = 0
+    
+    telegram_client = get_telegram_client()
+    
+    try:
+        # Инициализируем клиент перед использованием
+        await telegram_client.initialize()
+        chat_service = get_chat_service()
+        
+        logger.debug("[API] Всего чатов для проверки: %s", len(all_chat_ids))
+        
+        # Если нет чатов, выводим предупреждение
+        if not all_chat_ids:
+            logger.warning("[API] ВНИМАНИЕ: Не найдено чатов в хранилище!")
+            logger.warning("[API] Чаты будут появляться автоматически при:")
+            logger.warning("[API] 1. Получении сообщений в группах")
+            logger.warning("[API] 2. Добавлении бота в группы (событие my_chat_member)")
+            logger.warning("[API] 3. Использовании команды /register в группе")
+        
+        # Retry конфигурация для операций с Telegram API
+        retry_config = RetryConfig(
+            max_attempts=3,
+            initial_delay=1.0,
+            max_delay=10.0
+        )
+        
+        # Функция-процессор для обработки одного чата
+        async def process_chat(chat_id: int) -> Tuple[Optional[str], Optional[ChatRow]]:
+            """
+            Обрабатывает один чат.
+            
+            Returns:
+                Кортеж (причина пропуска или None, данные чата или None).
+                Счетчики пропусков считаются после gather, без общего
+                изменяемого состояния между задачами
+            """
+            # Что уже известно из хранилища, решается без запросов к Telegram API:
+            # личные чаты (например, после /start) и чаты, где бот по событию
+            # my_chat_member не является администратором
+            stored_chat = all_chat_ids.get(chat_id, {})
+            stored_type = stored_chat.get('type')
+            if stored_type is not None and stored_type not in GROUP_CHAT_TYPES:
+                return 'not_group', None
+            bot_status = stored_chat.get('bot_status')
+            if bot_status is not None and bot_status not in ADMIN_STATUSES:
+                return 'not_admin', None
+            
+            try:
+                # Информация о чате и права не зависят друг от друга, поэтому
+                # запрашиваются одновременно: проверка чата стоит одного RTT.
+                # Права бота и пользователя проверяются по одному списку
+                # администраторов (один запрос getChatAdministrators, с retry)
+                chat, (is_bot_admin, is_user_creator) = await asyncio.gather(
+                    telegram_client.get_chat(chat_id),
+                    retry_async(
+                        chat_service.get_admin_rights,
+                        chat_id,
+                        user_id,
+                        config=retry_config
+                    )
+                )
+                
+                # Пропускаем, если это не группа или супергруппа
+                if chat.type not in GROUP_CHAT_TYPES:
+                    return 'not_group', None
+                
+                logger.debug("[API] Чат %s: бот админ = %s, пользователь %s создатель = %s",
+                             chat_id, is_bot_admin, user_id, is_user_creator)
+                
+                if not is_bot_admin:
+                    logger.debug("[API] Чат %s пропущен: бот не является администратором", chat_id)
+                    return 'not_admin', None
+                
+                if not is_user_creator:
+                    logger.debug("[API] Чат %s пропущен: пользователь %s не является создателем", chat_id, user_id)
+                    return 'not_creator', None
+                
+                # Фото чата не загружаем: ленивая загрузка на фронтенде
+                chat_data = ChatRow(
+                    id=chat.id,
+                    title=chat.title or 'Без названия',
+                    type=chat.type,
+                    username=chat.username,
+                    # members_count есть не у всех объектов чата
+                    members_count=getattr(chat, 'members_count', None),
+                    photo_url=None
+                )
+                
+                # В хранилище чат не записывается: чаты регистрирует бот по
+                # своим событиям, а запись файла блокировала бы общий event loop
+                
+                logger.debug("[API] Чат %s добавлен в результат", chat_id)
+                return None, chat_data
+                
+            except TelegramError as e:
+                # Обрабатываем ошибки Telegram API
+                handled_error = handle_telegram_error(e, f"chat_id={chat_id}")
+                logger.debug("[API] Не удалось получить информацию о чате %s: %s", chat_id, handled_error)
+                return 'error', None
+            except Exception as e:
+                logger.error(f"[API] Ошибка при обработке чата {chat_id}: {e}", exc_info=True)
+                return 'error', None
+        
+        # Обрабатываем чаты параллельно с ограничением одновременных запросов,
+        # чтобы не превысить глобальный лимит Telegram (~30 запросов/с)
+        chat_list = list(all_chat_ids)
+        logger.debug("[API] Начинаем параллельную обработку %s чатов (max_concurrent=%s)",
+                     len(chat_list), CHAT_FETCH_CONCURRENCY)
+        
+        results = await batch_process(
+            items=chat_list,
+            processor=process_chat,
+            max_concurrent=CHAT_FETCH_CONCURRENCY,
+            error_handler=lambda chat_id, e: logger.warning(
+                f"[API] Ошибка при батч-обработке чата {chat_id}: {e}"
+            )
+        )
+        
+        for result in results:
+            if result is None:
+                continue
+            skip_reason, chat_data = result
+            if chat_data is not None:
+                filtered_chats.append(chat_data)
+            elif skip_reason == 'not_group':
+                skipped_not_group += 1
+            elif skip_reason == 'not_admin':
+                skipped_not_admin += 1
+            elif skip_reason == 'not_creator':
+                skipped_not_creator += 1
+        logger.debug("[API] Параллельная обработка завершена: обработано %s чатов", len(filtered_chats))
+        return filtered_chats, skipped_not_group, skipped_not_admin, skipped_not_creator
+    
+    except Exception as e:
+        logger.error(f"[API] Ошибка при получении чатов: {e}", exc_info=True)
+        raise
+
+
+async def load_user_chats(user_id: int, offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    """
+    Формирует список чатов пользователя и сохраняет его в кэш.
+    
+    В результате полный список чатов окна: сортировка и пагинация
+    выполняются при каждом запросе над копией.
+    
+    Args:
+        user_id: ID пользователя
+        offset: Начало окна хранилища
+        limit: Размер окна хранилища или None для всего хранилища
+        
+    Returns:
+        Данные ответа /api/chats с полным списком чатов
+    """
+    # Снимок хранилища берем один раз: он используется и для проверки чатов,
+    # и для информационного сообщения. Хранилище может перечитывать файл,
+    # поэтому вызывается в пуле потоков и не блокирует общий event loop
+    loop = asyncio.get_running_loop()
+    stored_chats = await loop.run_in_executor(None, chat_storage.get_all_chats)
+    total_stored = len(stored_chats)
+    logger.debug("[API] Чатов в хранилище: %s", total_stored)
+    
+    # Окно хранилища: при переданном limit проверяются только чаты
+    # [offset, offset + limit), и число запросов к Telegram API зависит
+    # от размера окна, а не от размера всего хранилища
+    next_offset = None
+    if limit is not None:
+        window_end = offset + limit
+        if window_end < total_stored:
+            next_offset = window_end
+        stored_chats = stored_chats[offset:window_end]
+        logger.debug("[API] Окно хранилища: offset=%s, limit=%s, чатов в окне: %s", offset, limit, len(stored_chats))
+    
+    filtered_chats, skipped_not_group, skipped_not_admin, skipped_not_creator = await fetch_user_chats(
+        user_id, stored_chats
+    )
+    
+    # Подсчитываем статистику за один проход, без промежуточных списков
+    type_counts = Counter(map(attrgetter('type'), filtered_chats))
+    stats = {
+        'total': len(filtered_chats),
+        'groups': type_counts['group'],
+        'supergroups': type_counts['supergroup'],
+        'private': 0,
+        'channels': 0
+    }
+    
+    # Единственная INFO запись на проверку: только итоговые счетчики
+    logger.info(
+        "[API] Чаты пользователя %s: найдено %s (пропущено: не группа %s, бот не админ %s, "
+        "пользователь не создатель %s)",
+        user_id, len(filtered_chats), skipped_not_group, skipped_not_admin, skipped_not_creator
+    )
+    
+    result = {
+        'success': True,
+        'chats': filtered_chats,
+        'stats': stats,
+        'pagination': {
+            'total': len(filtered_chats)
+        }
+    }
+    
+    if limit is not None:
+        result['next_offset'] = next_offset
+    
+    # Добавляем информационное сообщение, если чатов нет
+    if not filtered_chats and total_stored == 0:
+        result['info'] = (
+            "Чаты не найдены. Telegram Bot API не предоставляет способ получить список всех чатов.\n\n"
+            "Чаты будут автоматически регистрироваться при:\n"
+            "• Получении любого сообщения в группе\n"
+            "• Добавлении бота в группу (событие my_chat_member)\n"
+            "• Использовании команды /register в группе\n\n"
+            "Отправьте любое сообщение в группе или используйте /register для регистрации."
+        )
+    
+    get_cache().set(chats_cache_key(user_id, offset, limit), result, ttl=CHATS_CACHE_TTL)
+    return result
+
+
+# Активные пользователи /api/chats: user_id -> время последнего запроса.
+# Используется только из фонового event loop, поэтому блокировка не нужна
+_recent_chat_requests: Dict[int, float] = {}
+_chats_refresher: Optional["asyncio.Task[None]"] = None
+
+
+def track_chats_request(user_id: int) -> None:
+    """
+    Запоминает запрос списка чатов и запускает фоновое обновление.
+    
+    Вызывается из view, выполняющейся в фоновом event loop. Учитывается
+    только пользователь, а не окно хранилища (offset/limit) из запроса:
+    иначе, меняя параметры, клиент умножал бы фоновые запросы к API.
+    
+    Args:
+        user_id: ID пользователя
+    """
+    global _chats_refresher
+    
+    _recent_chat_requests[user_id] = time.monotonic()
+    
+    loop = asyncio.get_running_loop()
+    if _chats_refresher is None or _chats_refresher.done() or _chats_refresher.get_loop() is not loop:
+        # Задача живет дольше запроса: создаем ее в пустом контексте,
+        # чтобы она не удерживала контекст запроса Flask
+        _chats_refresher = contextvars.Context().run(loop.create_task, _refresh_recent_chats())
+
+
+async def _refresh_recent_chats() -> None:
+    """
+    Периодически обновляет кэш списков чатов активных пользователей.
+    
+    Проверка чатов через Telegram API выполняется в фоне раз в
+    CHATS_REFRESH_INTERVAL секунд, и запросы активных пользователей
+    попадают в кэш. Обновляется только список по умолчанию (все хранилище,
+    его запрашивает Mini App), поэтому число запросов к API зависит от
+    числа активных пользователей, а не от числа обращений или их
+    параметров. Задача завершается, когда активных пользователей не осталось.
+    """
+    while _recent_chat_requests:
+        await asyncio.sleep(CHATS_REFRESH_INTERVAL)
+        
+        inactive_before = time.monotonic() - CHATS_ACTIVE_WINDOW
+        for user_id, seen_at in list(_recent_chat_requests.items()):
+            if seen_at < inactive_before:
+                _recent_chat_requests.pop(user_id, None)
+                continue
+            cache_key = chats_cache_key(user_id, 0, None)
+            try:
+                await single_flight(cache_key, partial(load_user_chats, user_id, 0, None))
+            except Exception as e:
+                logger.warning(f"[API] Не удалось обновить список чатов ({cache_key}): {e}")
+
+
+def authenticate_webapp_user(
+    init_data: str,
+    claimed_user_id: Optional[int],
+    endpoint: str
+) -> Tuple[Optional[int], Optional[Response]]:
+    """
+    Определяет пользователя запроса по подписанным init_data.
+    
+    user_id из тела запроса клиент может подменить, поэтому он только
+    сверяется с ID из init_data.
+    
+    Args:
+        init_data: Данные Telegram WebApp из запроса
+        claimed_user_id: user_id из тела запроса или None
+        endpoint: Endpoint для логов, например "POST /api/chats"
+        
+    Returns:
+        Кортеж (ID пользователя, None) или (None, ответ с ошибкой)
+    """
+    webapp_user_id = get_webapp_user_id(init_data)
+    if webapp_user_id is None:
+        logger.warning(f"[API] {endpoint} - невалидные данные WebApp от пользователя {claimed_user_id}")
+        return None, json_response({
+            'success': False,
+            'error': 'Невалидные данные WebApp'
+        }, 400)
+    
+    if claimed_user_id is not None and claimed_user_id != webapp_user_id:
+        logger.warning(
+            f"[API] {endpoint} - user_id {claimed_user_id} не совпадает с данными WebApp ({webapp_user_id})"
+        )
+        return None, json_response({
+            'success': False,
+            'error': 'user_id не совпадает с данными WebApp'
+        }, 403)
+    return webapp_user_id, None
 
 
 @app.route('/api/chats', methods=['POST'])
 @limiter.limit("10 per minute")  # Rate limiting: 10 запросов в минуту
 @track_metrics('get_chats')
-def get_chats():
+async def get_chats():
     """API endpoint для получения списка чатов"""
     try:
         data = request.get_json() or {}
@@ -293,6 +1002,8 @@ def get_chats():
             init_data = validated_data.init_data
             page = validated_data.page
             per_page = validated_data.per_page
+            limit = validated_data.limit
+            offset = validated_data.offset
         except ValidationError as e:
             logger.warning(f"[API] POST /api/chats - ошибка валидации: {e}")
             # Преобразуем ошибки валидации в сериализуемый формат
@@ -303,356 +1014,145 @@ def get_chats():
                     'message': str(error.get('msg', '')),
                     'type': error.get('type', '')
                 })
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Невалидные данные запроса',
                 'details': error_details
-            }), 400
+            }, 400)
         
-        # Дополнительная валидация WebApp данных
-        if not validate_telegram_webapp_data(init_data):
-            logger.warning(f"[API] POST /api/chats - невалидные данные WebApp от пользователя {user_id}")
-            return jsonify({
-                'success': False,
-                'error': 'Невалидные данные WebApp'
-            }), 400
+        # ID пользователя берется из подписанных init_data
+        user_id, error_response = authenticate_webapp_user(init_data, user_id, "POST /api/chats")
+        if error_response is not None:
+            return error_response
         
-        logger.info(f"[API] POST /api/chats - запрос от пользователя {user_id}")
+        logger.debug("[API] POST /api/chats - запрос от пользователя %s", user_id)
+        
+        # Параметры сортировки из запроса. Неизвестные значения приводятся
+        # к тем, что фактически применит sort_chats, чтобы одинаковые
+        # результаты имели один ключ кэша
+        sort_by = data.get('sort_by', 'title')  # title, members_count, type
+        sort_order = data.get('sort_order', 'asc')  # asc, desc
+        if sort_by not in CHAT_SORT_FIELDS:
+            sort_by, sort_order = 'title', 'asc'
+        elif sort_order != 'desc':
+            sort_order = 'asc'
         
         cache = get_cache()
-        cache_key = f"chats:{user_id}"
+        cache_key = chats_cache_key(user_id, offset, limit)
+        
+        # Пока пользователь активен, его список обновляется в фоне
+        track_chats_request(user_id)
         
         # Проверяем кэш
+        degraded = False
         cached_result = cache.get(cache_key)
         if cached_result is not None:
-            logger.info(f"[API] Возвращаем кэшированные данные для пользователя {user_id}")
-            return jsonify(cached_result)
-        
-        telegram_client = get_telegram_client()
-        from bot.services.chat_service import ChatService
-        
-        all_chat_ids = set()
-        filtered_chats = []
-        skipped_not_admin = 0
-        skipped_not_creator = 0
-        skipped_not_group = 0
-        use_cached_on_error = False
-        
-        async def get_chats_from_telegram():
-            nonlocal all_chat_ids, filtered_chats, skipped_not_admin, skipped_not_creator, skipped_not_group
-            
+            logger.debug("[API] Возвращаем кэшированные данные для пользователя %s", user_id)
+        else:
+            # Одновременные одинаковые запросы (тот же пользователь и окно)
+            # ждут одну проверку
             try:
-                # Инициализируем клиент перед использованием
-                await telegram_client.initialize()
-                chat_service = ChatService(telegram_client.bot)
-                
-                # Получаем чаты только из хранилища
-                stored_chats = chat_storage.get_all_chats()
-                logger.info(f"[API] Чатов в хранилище: {len(stored_chats)}")
-                
-                for stored_chat in stored_chats:
-                    all_chat_ids.add(stored_chat['id'])
-                
-                logger.info(f"[API] Всего чатов для проверки: {len(all_chat_ids)}")
-                
-                # Если нет чатов, выводим предупреждение
-                if len(all_chat_ids) == 0:
-                    logger.warning("[API] ВНИМАНИЕ: Не найдено чатов в хранилище!")
-                    logger.warning("[API] Чаты будут появляться автоматически при:")
-                    logger.warning("[API] 1. Получении сообщений в группах")
-                    logger.warning("[API] 2. Добавлении бота в группы (событие my_chat_member)")
-                    logger.warning("[API] 3. Использовании команды /register в группе")
-                
-                # Retry конфигурация для операций с Telegram API
-                retry_config = RetryConfig(
-                    max_attempts=3,
-                    initial_delay=1.0,
-                    max_delay=10.0
+                cached_result = await single_flight(
+                    cache_key, partial(load_user_chats, user_id, offset, limit)
                 )
-                
-                # Функция-процессор для обработки одного чата
-                async def process_chat(chat_id: int):
-                    """Обрабатывает один чат и возвращает данные или None"""
-                    nonlocal skipped_not_group, skipped_not_admin, skipped_not_creator
-                    try:
-                        # Получаем информацию о чате через TelegramClient (с встроенным retry)
-                        chat = await telegram_client.get_chat(chat_id)
-                        
-                        # Пропускаем, если это не группа или супергруппа
-                        if chat.type not in ['group', 'supergroup']:
-                            skipped_not_group += 1
-                            return None
-                        
-                        chat_title = chat.title or 'Без названия'
-                        logger.debug(f"[API] Проверка чата {chat_id} ({chat_title}, {chat.type})")
-                        
-                        # Проверяем, является ли бот администратором (с retry)
-                        is_bot_admin = await retry_async(
-                            chat_service.is_bot_admin,
-                            chat_id,
-                            config=retry_config
-                        )
-                        logger.debug(f"[API] Чат {chat_id}: бот админ = {is_bot_admin}")
-                        
-                        if not is_bot_admin:
-                            skipped_not_admin += 1
-                            logger.debug(f"[API] Чат {chat_id} пропущен: бот не является администратором")
-                            return None
-                        
-                        # Проверяем, является ли пользователь создателем (с retry)
-                        is_user_creator = await retry_async(
-                            chat_service.is_user_creator,
-                            chat_id,
-                            user_id,
-                            config=retry_config
-                        )
-                        logger.debug(f"[API] Чат {chat_id}: пользователь {user_id} создатель = {is_user_creator}")
-                        
-                        if not is_user_creator:
-                            skipped_not_creator += 1
-                            logger.debug(f"[API] Чат {chat_id} пропущен: пользователь {user_id} не является создателем")
-                            return None
-                        
-                        # Получаем фото чата (если есть) - ленивая загрузка, пропускаем для оптимизации
-                        # Фото можно загружать отдельно при необходимости
-                        chat_photo_url = None
-                        
-                        # Формируем данные чата
-                        chat_data = {
-                            'id': chat.id,
-                            'title': chat.title or 'Без названия',
-                            'type': chat.type,
-                            'username': getattr(chat, 'username', None),
-                            'members_count': getattr(chat, 'members_count', None),
-                            'photo_url': None
-                        }
-                        
-                        # Сохраняем в хранилище
-                        chat_storage.register_chat(chat)
-                        
-                        logger.debug(f"[API] Чат {chat_id} добавлен в результат")
-                        return chat_data
-                        
-                    except TelegramError as e:
-                        # Обрабатываем ошибки Telegram API
-                        handled_error = handle_telegram_error(e, f"chat_id={chat_id}")
-                        logger.debug(f"[API] Не удалось получить информацию о чате {chat_id}: {handled_error}")
-                        return None
-                    except Exception as e:
-                        logger.error(f"[API] Ошибка при обработке чата {chat_id}: {e}", exc_info=True)
-                        return None
-                
-                # Обрабатываем чаты параллельно с ограничением (максимум 5 одновременных запросов)
-                # Это значительно ускорит обработку большого количества чатов
-                chat_list = list(all_chat_ids)
-                logger.info(f"[API] Начинаем параллельную обработку {len(chat_list)} чатов (max_concurrent=5)")
-                
-                processed_chats = await batch_process_with_filter(
-                    items=chat_list,
-                    processor=process_chat,
-                    max_concurrent=5,  # Ограничение для избежания rate limits
-                    error_handler=lambda chat_id, e: logger.warning(
-                        f"[API] Ошибка при батч-обработке чата {chat_id}: {e}"
-                    )
-                )
-                
-                filtered_chats.extend(processed_chats)
-                logger.info(f"[API] Параллельная обработка завершена: обработано {len(processed_chats)} чатов")
-                        
             except Exception as e:
                 logger.error(f"[API] Ошибка при получении чатов: {e}", exc_info=True)
-                raise
-        
-        # Запускаем async функцию через безопасный helper
-        try:
-            run_async_safe(get_chats_from_telegram())
-        except Exception as e:
-            logger.error(f"[API] Ошибка при получении чатов: {e}", exc_info=True)
-            # Graceful degradation: пытаемся вернуть кэшированные данные
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
+                # Graceful degradation: пытаемся вернуть кэшированные данные
+                cached_result = cache.get(cache_key)
+                if cached_result is None:
+                    raise
                 logger.warning(f"[API] Используем кэшированные данные из-за ошибки API")
-                cached_result['cached'] = True
-                cached_result['warning'] = 'Данные могут быть устаревшими из-за ошибки API'
-                return jsonify(cached_result)
-            raise
+                degraded = True
+                cached_result = {
+                    **cached_result,
+                    'cached': True,
+                    'warning': 'Данные могут быть устаревшими из-за ошибки API'
+                }
         
-        logger.info(f"[API] Результат фильтрации: {len(filtered_chats)} чатов")
-        logger.info(f"[API] Пропущено (не группа): {skipped_not_group}, "
-                   f"(бот не админ): {skipped_not_admin}, "
-                   f"(пользователь не создатель): {skipped_not_creator}")
-        
-        # Подсчитываем статистику
-        stats = {
-            'total': len(filtered_chats),
-            'groups': len([c for c in filtered_chats if c['type'] == 'group']),
-            'supergroups': len([c for c in filtered_chats if c['type'] == 'supergroup']),
-            'private': 0,
-            'channels': 0
-        }
-        
-        # Получаем параметры сортировки из запроса
-        sort_by = data.get('sort_by', 'title')  # title, members_count, type
-        sort_order = data.get('sort_order', 'asc')  # asc, desc
-        
-        # Сортировка
-        if sort_by == 'title':
-            filtered_chats.sort(key=lambda x: x['title'].lower(), reverse=(sort_order == 'desc'))
-        elif sort_by == 'members_count':
-            filtered_chats.sort(key=lambda x: x.get('members_count', 0) or 0, reverse=(sort_order == 'desc'))
-        elif sort_by == 'type':
-            filtered_chats.sort(key=lambda x: x['type'], reverse=(sort_order == 'desc'))
-        else:
-            # По умолчанию по названию
-            filtered_chats.sort(key=lambda x: x['title'].lower())
-        
-        # Пагинация
-        total_chats = len(filtered_chats)
-        total_pages = (total_chats + per_page - 1) // per_page if total_chats > 0 else 1
-        
-        # Проверяем, что запрошенная страница существует
-        if page > total_pages and total_pages > 0:
-            page = total_pages
-        
-        # Вычисляем индексы для среза
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        # Получаем чаты для текущей страницы
-        paginated_chats = filtered_chats[start_idx:end_idx]
-        
-        # Метаданные пагинации
-        pagination = {
-            'page': page,
-            'per_page': per_page,
-            'total': total_chats,
-            'total_pages': total_pages,
-            'has_next': page < total_pages,
-            'has_prev': page > 1
-        }
-        
-        # Добавляем информационное сообщение, если чатов нет
-        info_message = None
-        if len(filtered_chats) == 0 and len(all_chat_ids) == 0:
-            info_message = (
-                "Чаты не найдены. Telegram Bot API не предоставляет способ получить список всех чатов.\n\n"
-                "Чаты будут автоматически регистрироваться при:\n"
-                "• Получении любого сообщения в группе\n"
-                "• Добавлении бота в группу (событие my_chat_member)\n"
-                "• Использовании команды /register в группе\n\n"
-                "Отправьте любое сообщение в группе или используйте /register для регистрации."
-            )
-        
-        logger.info(f"[API] POST /api/chats - страница {page}/{total_pages}, возвращено {len(paginated_chats)} из {total_chats} чатов")
-        
-        response_data = {
-            'success': True,
-            'chats': paginated_chats,
-            'stats': stats,
-            'pagination': pagination
-        }
+        # Страница сериализуется один раз на версию списка: запись кэша
+        # страницы хранит ссылку на список, из которого построена, и после
+        # обновления списка строится заново
+        total_pages = max(1, (len(cached_result['chats']) + per_page - 1) // per_page)
+        page_key = f"{cache_key}:{sort_by}:{sort_order}:{min(page, total_pages)}:{per_page}"
+        page_entry = None if degraded else cache.get(page_key)
+        if page_entry is not None and page_entry[0] is cached_result:
+            return etag_json_response(page_entry[1])
         
-        if info_message:
-            response_data['info'] = info_message
-        
-        # Сохраняем в кэш (TTL: 5 минут)
-        # ВАЖНО: кэшируем полный список, а не только текущую страницу
-        cache_data = {
-            'success': True,
-            'chats': filtered_chats,  # Полный список для кэша
-            'stats': stats,
-            'pagination': {
-                'total': total_chats,
-                'total_pages': total_pages
-            }
-        }
-        cache.set(cache_key, cache_data, ttl=300.0)
+        # В кэше полный список: сортируем копию и отдаем только запрошенную страницу
+        chats = list(cached_result['chats'])
+        sort_chats(chats, sort_by, sort_order)
+        paginated_chats, pagination = paginate_chats(chats, page, per_page)
+        logger.debug(
+            "[API] POST /api/chats - пользователь %s: страница %s/%s, возвращено %s из %s чатов",
+            user_id, pagination['page'], pagination['total_pages'], len(paginated_chats), pagination['total']
+        )
         
-        return jsonify(response_data)
+        body = orjson.dumps({**cached_result, 'chats': paginated_chats, 'pagination': pagination})
+        if not degraded:
+            cache.set(page_key, (cached_result, body), ttl=CHATS_CACHE_TTL)
+        return etag_json_response(body)
         
     except Exception as e:
         logger.error(f"[API] Ошибка при получении списка чатов: {e}", exc_info=True)
         # Убеждаемся, что ошибка сериализуема
         error_message = str(e) if e else 'Неизвестная ошибка'
-        return jsonify({
+        return json_response({
             'success': False,
             'error': 'Не удалось загрузить список чатов',
             'details': error_message
-        }), 500
+        }, 500)
 
 
-@app.route('/api/chats/<chat_id>', methods=['DELETE'])
+@app.route('/api/chats/<chat_id:chat_id>', methods=['DELETE'])
 @limiter.limit("10 per minute")  # Rate limiting: 10 запросов в минуту
 @track_metrics('delete_chat')
-def delete_chat(chat_id: str):
+def delete_chat(chat_id: int):
     """API endpoint для удаления чата из списка"""
-    try:
-        chat_id_int = validate_chat_id(chat_id)
-    except ValueError as e:
-        logger.warning(f"[API] DELETE /api/chats/{chat_id} - {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 400
+    # Ошибки валидации обрабатывает handle_validation_error (400)
+    validated_data = ChatDeleteRequest(**(request.get_json(silent=True) or {}))
+    user_id, error_response = authenticate_webapp_user(
+        validated_data.init_data, validated_data.user_id, f"DELETE /api/chats/{chat_id}"
+    )
+    if error_response is not None:
+        return error_response
     
     try:
-        data = request.get_json() or {}
-        user_id = data.get('user_id')
-        
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'user_id не указан'
-            }), 400
-        
         # Удаляем чат из хранилища
-        chat_storage.delete_chat(chat_id_int)
+        chat_storage.delete_chat(chat_id)
         
-        # Инвалидируем кэш
-        cache = get_cache()
-        cache.invalidate_pattern(f"chats:{user_id}")
-        cache.invalidate_pattern(f"members:{chat_id_int}:")
+        # Инвалидируем кэш списков чатов пользователя и участников чата
+        # за один проход по ключам
+        get_cache().invalidate_pattern((f"chats:{user_id}", f"members:{chat_id}:"))
         
-        logger.info(f"[API] Чат {chat_id_int} удален из списка пользователем {user_id}")
+        logger.info(f"[API] Чат {chat_id} удален из списка пользователем {user_id}")
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Чат успешно удален из списка'
         })
     except Exception as e:
-        logger.error(f"[API] Ошибка при удалении чата {chat_id_int}: {e}", exc_info=True)
+        logger.error(f"[API] Ошибка при удалении чата {chat_id}: {e}", exc_info=True)
         error_message = str(e) if e else 'Неизвестная ошибка'
-        return jsonify({
+        return json_response({
             'success': False,
             'error': 'Не удалось удалить чат',
             'details': error_message
-        }), 500
+        }, 500)
 
 
-@app.route('/api/chats/<chat_id>/members', methods=['POST'])
+@app.route('/api/chats/<chat_id:chat_id>/members', methods=['POST'])
 @limiter.limit("20 per minute")  # Rate limiting: 20 запросов в минуту
 @track_metrics('get_chat_members')
-def get_chat_members(chat_id: str):
+async def get_chat_members(chat_id: int):
     """API endpoint для получения списка участников чата"""
-    # Валидация chat_id
-    try:
-        chat_id_int = validate_chat_id(chat_id)
-    except ValueError as e:
-        logger.warning(f"[API] POST /api/chats/{chat_id}/members - {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 400
-    
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         
         # Валидация данных через pydantic
         try:
             validated_data = ChatMembersRequest(**data)
-            user_id = validated_data.user_id
         except ValidationError as e:
-            logger.warning(f"[API] POST /api/chats/{chat_id_int}/members - ошибка валидации: {e}")
+            logger.warning(f"[API] POST /api/chats/{chat_id}/members - ошибка валидации: {e}")
             # Преобразуем ошибки валидации в сериализуемый формат
             error_details = []
             for error in e.errors():
@@ -661,26 +1161,33 @@ def get_chat_members(chat_id: str):
                     'message': str(error.get('msg', '')),
                     'type': error.get('type', '')
                 })
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Невалидные данные запроса',
                 'details': error_details
-            }), 400
+            }, 400)
         
-        logger.info(f"[API] POST /api/chats/{chat_id_int}/members - запрос от пользователя {user_id}")
+        # ID пользователя берется из подписанных init_data: по нему
+        # проверяется, что пользователь - создатель чата
+        user_id, error_response = authenticate_webapp_user(
+            validated_data.init_data, validated_data.user_id, f"POST /api/chats/{chat_id}/members"
+        )
+        if error_response is not None:
+            return error_response
+        
+        logger.debug("[API] POST /api/chats/%s/members - запрос от пользователя %s", chat_id, user_id)
         
         cache = get_cache()
-        cache_key = f"members:{chat_id_int}:{user_id}"
+        cache_key = f"members:{chat_id}:{user_id}"
         
-        # Проверяем кэш
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            logger.info(f"[API] Возвращаем кэшированные данные участников для чата {chat_id_int}")
-            return jsonify(cached_result)
+        # Проверяем кэш: в нем хранится уже сериализованное тело ответа
+        cached_body = cache.get(cache_key)
+        if cached_body is not None:
+            logger.debug("[API] Возвращаем кэшированные данные участников для чата %s", chat_id)
+            return json_response(cached_body)
         
         telegram_client = get_telegram_client()
-        from bot.services.chat_service import ChatService
-        chat_service = ChatService(telegram_client.bot)
+        chat_service = get_chat_service()
         
         # Проверяем права пользователя и бота
         async def check_and_get_members():
@@ -695,42 +1202,32 @@ def get_chat_members(chat_id: str):
                     max_delay=10.0
                 )
                 
-                # Проверяем, является ли пользователь создателем (с retry)
+                # Проверяем права пользователя и бота одним запросом (с retry)
                 try:
-                    is_user_creator = await retry_async(
-                        chat_service.is_user_creator,
-                        chat_id_int,
+                    is_bot_admin, is_user_creator = await retry_async(
+                        chat_service.get_admin_rights,
+                        chat_id,
                         user_id,
                         config=retry_config
                     )
-                    logger.debug(f"[API] Чат {chat_id_int}: пользователь {user_id} создатель = {is_user_creator}")
                 except Exception as e:
-                    logger.error(f"[API] Ошибка при проверке прав создателя (после retry): {e}", exc_info=True)
-                    # При ошибке после retry возвращаем False
-                    is_user_creator = False
+                    logger.error(f"[API] Ошибка при проверке прав (после retry): {e}", exc_info=True)
+                    # При ошибке после retry считаем, что прав нет
+                    is_bot_admin, is_user_creator = False, False
                 
                 if not is_user_creator:
                     return None, "Пользователь не является создателем группы"
                 
-                # Проверяем, является ли бот администратором (с retry)
-                try:
-                    is_bot_admin = await retry_async(
-                        chat_service.is_bot_admin,
-                        chat_id_int,
-                        config=retry_config
-                    )
-                    logger.debug(f"[API] Чат {chat_id_int}: бот админ = {is_bot_admin}")
-                except Exception as e:
-                    logger.error(f"[API] Ошибка при проверке прав бота (после retry): {e}", exc_info=True)
-                    # При ошибке после retry возвращаем False
-                    is_bot_admin = False
-                
                 if not is_bot_admin:
                     return None, "Бот не является администратором группы"
                 
-                # Получаем список участников
-                members = await chat_service.get_chat_members_list(chat_id_int)
-                logger.info(f"[API] Получено {len(members)} участников для чата {chat_id_int}")
+                # Получаем список участников. Список не зависит от пользователя,
+                # поэтому одновременные запросы к одному чату ждут один вызов API
+                members = await single_flight(
+                    f"members:{chat_id}",
+                    lambda: chat_service.get_chat_members_list(chat_id)
+                )
+                logger.debug("[API] Получено %s участников для чата %s", len(members), chat_id)
                 
                 # Ленивая загрузка фото профиля - не загружаем сразу
                 # Фото будет загружено на фронтенде при необходимости
@@ -738,7 +1235,7 @@ def get_chat_members(chat_id: str):
                 
                 return members, None
             except TelegramError as e:
-                handled_error = handle_telegram_error(e, f"chat_id={chat_id_int}, user_id={user_id}")
+                handled_error = handle_telegram_error(e, f"chat_id={chat_id}, user_id={user_id}")
                 error_msg = get_user_friendly_message(handled_error)
                 logger.error(f"[API] Ошибка Telegram API: {error_msg}")
                 return None, error_msg
@@ -746,62 +1243,61 @@ def get_chat_members(chat_id: str):
                 logger.error(f"[API] Ошибка при получении участников: {e}", exc_info=True)
                 return None, "Не удалось получить список участников"
         
-        # Запускаем async функцию через безопасный helper
         try:
-            members, error = run_async_safe(check_and_get_members())
+            members, error = await check_and_get_members()
         except Exception as e:
             logger.error(f"[API] Ошибка при получении участников: {e}", exc_info=True)
             # Graceful degradation: пытаемся вернуть кэшированные данные
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
+            cached_body = cache.get(cache_key)
+            if cached_body is not None:
                 logger.warning(f"[API] Используем кэшированные данные участников из-за ошибки API")
-                cached_result['cached'] = True
-                cached_result['warning'] = 'Данные могут быть устаревшими из-за ошибки API'
-                return jsonify(cached_result)
+                return json_response(
+                    mark_stale_body(cached_body, 'Данные могут быть устаревшими из-за ошибки API')
+                )
             raise
         
         if error:
-            logger.warning(f"[API] POST /api/chats/{chat_id_int}/members - ошибка: {error}")
+            logger.warning(f"[API] POST /api/chats/{chat_id}/members - ошибка: {error}")
             # Пытаемся вернуть кэшированные данные при ошибке доступа
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
+            cached_body = cache.get(cache_key)
+            if cached_body is not None:
                 logger.warning(f"[API] Используем кэшированные данные участников из-за ошибки доступа")
-                cached_result['cached'] = True
-                cached_result['warning'] = f'Данные могут быть устаревшими. Ошибка: {error}'
-                return jsonify(cached_result)
-            return jsonify({
+                return json_response(
+                    mark_stale_body(cached_body, f'Данные могут быть устаревшими. Ошибка: {error}')
+                )
+            return json_response({
                 'success': False,
                 'error': error
-            }), 403
+            }, 403)
         
-        logger.info(f"[API] POST /api/chats/{chat_id_int}/members - успешно возвращено {len(members)} участников")
+        logger.info("[API] POST /api/chats/%s/members - возвращено %s участников", chat_id, len(members))
         
-        response_data = {
+        # Кэшируем сериализованное тело: попадания в кэш не сериализуют
+        # список участников заново
+        body = orjson.dumps({
             'success': True,
             'members': members
-        }
-        
-        # Сохраняем в кэш (TTL: 15 минут, участники меняются реже)
-        cache.set(cache_key, response_data, ttl=900.0)
+        })
+        cache.set(cache_key, body, ttl=MEMBERS_CACHE_TTL)
         
-        return jsonify(response_data)
+        return json_response(body)
         
     except TelegramError as e:
-        handled_error = handle_telegram_error(e, f"chat_id={chat_id_int}")
+        handled_error = handle_telegram_error(e, f"chat_id={chat_id}")
         error_msg = get_user_friendly_message(handled_error)
-        logger.error(f"[API] Ошибка Telegram API при получении участников чата {chat_id_int}: {error_msg}")
-        return jsonify({
+        logger.error(f"[API] Ошибка Telegram API при получении участников чата {chat_id}: {error_msg}")
+        return json_response({
             'success': False,
             'error': error_msg
-        }), 500
+        }, 500)
     except Exception as e:
-        logger.error(f"[API] Ошибка при получении участников чата {chat_id_int}: {e}", exc_info=True)
+        logger.error(f"[API] Ошибка при получении участников чата {chat_id}: {e}", exc_info=True)
         error_message = str(e) if e else 'Неизвестная ошибка'
-        return jsonify({
+        return json_response({
             'success': False,
             'error': 'Не удалось загрузить список участников',
             'details': error_message
-        }), 500
+        }, 500)
 
 
 @app.route('/api/metrics')
@@ -809,12 +1305,13 @@ def get_metrics():
     """Endpoint для получения метрик производительности"""
     # Вычисляем среднее время ответа по каждому endpoint
     avg_times = {}
-    for metric in _metrics['api_response_times']:
-        endpoint = metric['endpoint']
+    # Снимок: deque нельзя обходить, пока другие потоки добавляют записи
+    for metric in list(_metrics['api_response_times']):
+        endpoint = metric.endpoint
         if endpoint not in avg_times:
             avg_times[endpoint] = {'times': [], 'errors': 0}
-        if metric['status'] == 'success':
-            avg_times[endpoint]['times'].append(metric['response_time'])
+        if metric.status == 'success':
+            avg_times[endpoint]['times'].append(metric.response_time_ns)
         else:
             avg_times[endpoint]['errors'] += 1
     
@@ -823,87 +1320,141 @@ def get_metrics():
     for endpoint, data in avg_times.items():
         if data['times']:
             metrics_summary[endpoint] = {
-                'avg_response_time': sum(data['times']) / len(data['times']),
-                'min_response_time': min(data['times']),
-                'max_response_time': max(data['times']),
+                'avg_response_time': sum(data['times']) / len(data['times']) / 1e9,
+                'min_response_time': min(data['times']) / 1e9,
+                'max_response_time': max(data['times']) / 1e9,
                 'total_requests': len(data['times']) + data['errors'],
                 'errors': data['errors'],
                 'success_rate': len(data['times']) / (len(data['times']) + data['errors']) if (len(data['times']) + data['errors']) > 0 else 0
             }
     
-    return jsonify({
+    return json_response({
         'requests': _metrics['api_requests'],
         'response_times': metrics_summary,
         'total_metrics': len(_metrics['api_response_times'])
     })
 
-@app.route('/health')
-def health():
-    """Health check endpoint с расширенной проверкой"""
-    import asyncio
-    from bot.utils.cache import get_cache
+# Проверки /health перехватывают только ожидаемые отказы зависимостей.
+# Прочие исключения - ошибки в коде: они доходят до handle_exception
+# и логируются с трассировкой
+
+def _check_cache() -> Dict[str, Any]:
+    """Проверка кэша для /health (in-memory, внешних отказов нет)"""
+    return {'status': 'ok', 'stats': get_cache().get_stats()}
+
+
+async def _check_telegram_api() -> Dict[str, Any]:
+    """Проверка доступности Telegram API для /health"""
+    try:
+        # Используем TelegramClient для получения информации о боте
+        bot_info = await get_telegram_client().get_me()
+        return {'status': 'ok', 'bot_id': bot_info.id, 'bot_username': bot_info.username}
+    except TelegramError as e:
+        # Сетевые ошибки и таймауты PTB также являются TelegramError
+        return {'status': 'error', 'error': str(e)}
+
+
+def _check_chat_storage() -> Dict[str, Any]:
+    """Проверка хранилища чатов для /health"""
+    try:
+        stats = chat_storage.get_stats()
+        return {'status': 'ok', 'total_chats': stats['total']}
+    except OSError as e:
+        # Ошибки чтения и разбора файла хранилище обрабатывает само
+        return {'status': 'error', 'error': str(e)}
+
+
+# Последний ответ /health: (time.monotonic() проверки, тело, HTTP статус).
+# Используется только из фонового event loop, поэтому блокировка не нужна
+_health_response: Optional[Tuple[float, bytes, int]] = None
+
+
+async def _collect_health_checks(fail_fast: bool) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """
+    Выполняет проверки зависимостей для /health.
     
-    health_status = {
-        'status': 'ok',
-        'timestamp': time.time(),
-        'checks': {}
+    Проверки независимы и выполняются одновременно: время ответа равно
+    самой долгой проверке (обычно запрос к Telegram API), а не их сумме.
+    Хранилище может перечитывать файл, поэтому проверяется в пуле
+    потоков и не блокирует общий event loop.
+    
+    Args:
+        fail_fast: Прекратить проверки после первой неуспешной: итоговый
+            статус уже известен, оставшиеся проверки отменяются
+        
+    Returns:
+        Кортеж (результаты проверок, выполнены ли все проверки)
+    """
+    loop = asyncio.get_running_loop()
+    probes = {
+        asyncio.ensure_future(_check_telegram_api()): 'telegram_api',
+        loop.run_in_executor(None, _check_chat_storage): 'chat_storage'
     }
+    checks = {'cache': _check_cache()}
+    pending = set(probes)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            checks[probes[future]] = future.result()
+        if fail_fast and pending and any(check['status'] != 'ok' for check in checks.values()):
+            # Поток пула отмена не прерывает, но ответ его больше не ждет
+            for future in pending:
+                future.cancel()
+                checks[probes[future]] = {'status': 'skipped'}
+            return checks, False
+    return checks, True
+
+
+async def _run_health_checks(fail_fast: bool = False) -> Tuple[float, bytes, int]:
+    """
+    Выполняет проверки /health и сохраняет ответ для повторного использования.
     
-    # Проверка кэша
-    try:
-        cache = get_cache()
-        cache_stats = cache.get_stats()
-        health_status['checks']['cache'] = {
-            'status': 'ok',
-            'stats': cache_stats
-        }
-    except Exception as e:
-        health_status['checks']['cache'] = {
-            'status': 'error',
-            'error': str(e)
-        }
-        health_status['status'] = 'degraded'
+    Неполный ответ (часть проверок пропущена в режиме fail_fast)
+    возвращается, но не сохраняется: подробный /health должен видеть
+    результаты всех проверок.
     
-    # Проверка Telegram API
-    try:
-        telegram_client = get_telegram_client()
+    Args:
+        fail_fast: Прекратить проверки после первой неуспешной
         
-        async def check_telegram_api():
-            try:
-                # Используем TelegramClient для получения информации о боте
-                bot_info = await telegram_client.get_me()
-                return {'status': 'ok', 'bot_id': bot_info.id, 'bot_username': bot_info.username}
-            except Exception as e:
-                return {'status': 'error', 'error': str(e)}
-        
-        telegram_check = run_async_safe(check_telegram_api())
-        health_status['checks']['telegram_api'] = telegram_check
-        
-        if telegram_check['status'] != 'ok':
-            health_status['status'] = 'degraded'
-    except Exception as e:
-        health_status['checks']['telegram_api'] = {
-            'status': 'error',
-            'error': str(e)
-        }
-        health_status['status'] = 'degraded'
+    Returns:
+        Кортеж (время проверки, JSON тело, HTTP статус)
+    """
+    global _health_response
+    checks, complete = await _collect_health_checks(fail_fast)
     
-    # Проверка хранилища чатов
-    try:
-        stats = chat_storage.get_stats()
-        health_status['checks']['chat_storage'] = {
-            'status': 'ok',
-            'total_chats': stats['total']
-        }
-    except Exception as e:
-        health_status['checks']['chat_storage'] = {
-            'status': 'error',
-            'error': str(e)
-        }
-        health_status['status'] = 'degraded'
+    is_ok = all(check['status'] == 'ok' for check in checks.values())
+    health_status = {
+        'status': 'ok' if is_ok else 'degraded',
+        'timestamp': time.time(),
+        'checks': checks
+    }
+    response = (time.monotonic(), orjson.dumps(health_status), 200 if is_ok else 503)
+    if complete:
+        _health_response = response
+    return response
+
+
+@app.route('/health')
+async def health():
+    """
+    Health check endpoint с расширенной проверкой.
     
-    status_code = 200 if health_status['status'] == 'ok' else 503
-    return jsonify(health_status), status_code
+    Результат проверки переиспользуется Config.HEALTH_CACHE_TTL секунд:
+    частые пробы оркестратора и мониторинга не запрашивают Telegram API
+    каждый раз, а одновременные запросы ждут одну проверку.
+    
+    С параметром ?fast=1 (для liveness проб) проверки прекращаются после
+    первой неуспешной, и 503 возвращается, не дожидаясь остальных.
+    """
+    fail_fast = request.args.get('fast') == '1'
+    cached = _health_response
+    if cached is None or time.monotonic() - cached[0] >= Config.HEALTH_CACHE_TTL:
+        cached = await single_flight(
+            ('health', fail_fast),
+            partial(_run_health_checks, fail_fast)
+        )
+    _, body, status_code = cached
+    return json_response(body, status_code)
 
 
 def run_webapp():
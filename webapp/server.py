@@ -0,0 +1,98 @@
+"""Запуск Mini App под production WSGI-сервером (gunicorn)"""
+import logging
+from typing import Any, Dict, Optional
+
+from bot.config import Config
+
+try:
+    from gunicorn.app.base import BaseApplication  # type: ignore
+except ImportError:  # pragma: no cover - опциональная зависимость
+    BaseApplication = None
+
+logger = logging.getLogger(__name__)
+
+
+if BaseApplication is not None:
+
+    class GunicornApplication(BaseApplication):
+        """
+        Встраиваемое gunicorn-приложение.
+
+        Позволяет запускать Flask приложение через gunicorn без отдельного
+        конфигурационного файла: все параметры берутся из Config.
+        """
+
+        def __init__(self, application: Any, options: Optional[Dict[str, Any]] = None):
+            self.options = options or {}
+            self.application = application
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key.lower(), value)
+
+        def load(self) -> Any:
+            return self.application
+
+
+def get_gunicorn_options() -> Dict[str, Any]:
+    """
+    Формирует настройки gunicorn из конфигурации.
+
+    Используется воркер gthread: async views выполняются в общем фоновом
+    event loop процесса, а gevent/eventlet патчат стандартную библиотеку
+    и конфликтуют с asyncio. Потоки внутри воркера позволяют обслуживать
+    параллельные запросы, пока запрос ждет ответа Telegram API.
+    
+    Лимиты Flask-Limiter (memory://), token bucket запросов к Telegram API
+    и кэши хранятся в памяти воркера, поэтому суммарные лимиты равны
+    настроенным, умноженным на число воркеров.
+
+    Returns:
+        Словарь с настройками gunicorn
+    """
+    return {
+        'bind': f"{Config.WEBAPP_HOST}:{Config.WEBAPP_PORT}",
+        'workers': Config.WEBAPP_WORKERS,
+        'threads': Config.WEBAPP_THREADS,
+        'worker_class': 'gthread',
+        'timeout': 60,
+        'accesslog': '-',
+        'errorlog': '-',
+        'loglevel': Config.LOG_LEVEL.lower(),
+    }
+
+
+def run_production_server() -> None:
+    """
+    Запускает веб-приложение под gunicorn.
+
+    gunicorn устанавливает обработчики сигналов, поэтому должен работать
+    в главном потоке отдельного процесса, а не в потоке рядом с ботом.
+
+    Raises:
+        RuntimeError: Если gunicorn не установлен
+    """
+    if BaseApplication is None:
+        raise RuntimeError(
+            "gunicorn не установлен. Установите его: pip install gunicorn"
+        )
+
+    from webapp.app import app
+
+    options = get_gunicorn_options()
+    logger.info(
+        f"Запуск gunicorn на {options['bind']} "
+        f"(workers={options['workers']}, threads={options['threads']})"
+    )
+    GunicornApplication(app, options).run()
+
+
+if __name__ == '__main__':
+    Config.validate()
+    logging.basicConfig(
+        format=Config.LOG_FORMAT,
+        level=getattr(logging, Config.LOG_LEVEL.upper())
+    )
+    run_production_server()
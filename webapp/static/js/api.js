@@ -2,6 +2,10 @@
 
 const API_URL = '/api/chats';
 
+// ETag и данные последнего ответа /api/chats: при 304 данные берутся отсюда
+let chatsEtag = null;
+let chatsData = null;
+
 /**
  * Загрузка списка чатов
  */
@@ -32,24 +36,40 @@ async function loadChats() {
             return;
         }
         
+        const headers = {
+            'Content-Type': 'application/json',
+        };
+        // Если данные не изменились, сервер ответит 304 без тела
+        if (chatsEtag && chatsData) {
+            headers['If-None-Match'] = chatsEtag;
+        }
+        
         // Отправляем запрос на сервер
         const response = await fetch(API_URL, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
+            headers,
+            // ID пользователя сервер берет из подписанных initData
             body: JSON.stringify({
-                init_data: initData,
-                user_id: userId
+                init_data: initData
             })
         });
         
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+        let data;
+        if (response.status === 304 && chatsData) {
+            data = chatsData;
+        } else {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            
+            data = await response.json();
+            
+            if (data.success) {
+                chatsEtag = response.headers.get('ETag');
+                chatsData = data;
+            }
         }
         
-        const data = await response.json();
-        
         if (!data.success) {
             if (window.showError) {
                 window.showError(data.error || 'Не удалось загрузить список чатов');
@@ -110,8 +130,9 @@ async function deleteChat(chatId, chatTitle) {
             headers: {
                 'Content-Type': 'application/json',
             },
+            // ID пользователя сервер берет из подписанных initData
             body: JSON.stringify({
-                user_id: tg.initDataUnsafe?.user?.id
+                init_data: tg.initData || ''
             })
         });
         
@@ -81,8 +81,9 @@ async function loadMembers(chatId) {
             headers: {
                 'Content-Type': 'application/json',
             },
+            // ID пользователя сервер берет из подписанных initData
             body: JSON.stringify({
-                user_id: userId
+                init_data: tg.initData || ''
             })
         });
         
@@ -142,19 +143,18 @@ function renderMembers(members) {
         return 0;
     });
     
+    let withPhoto = 0;
     membersList.innerHTML = sortedMembers.map(member => {
         const name = member.first_name + (member.last_name ? ' ' + member.last_name : '');
         const displayName = name || member.username || `User ${member.id}`;
         const initials = (member.first_name?.[0] || member.username?.[0] || 'U').toUpperCase();
         
-        console.log(`[Frontend] Обработка участника ${member.id} (${displayName}): profile_photo_url = ${member.profile_photo_url || 'отсутствует'}`);
-        
         // Ленивая загрузка фото профиля - загружаем только при необходимости
         let avatarHtml = '';
         if (member.profile_photo_url) {
             // Проверяем тип файла по расширению
             const photoUrl = member.profile_photo_url;
-            console.log(`[Frontend] Участник ${member.id}: есть profile_photo_url = ${photoUrl}`);
+            withPhoto++;
             
             const urlLower = photoUrl.toLowerCase();
             const isVideo = urlLower.includes('.mp4') || urlLower.includes('.mov') || urlLower.includes('video');
@@ -162,17 +162,14 @@ function renderMembers(members) {
             
             if (isVideo) {
                 // Видео аватарка с автопроигрыванием
-                console.log(`[Frontend] Участник ${member.id}: определяем как видео`);
                 avatarHtml = `<video class="member-avatar-img" autoplay loop muted playsinline><source src="${escapeHtml(photoUrl)}" type="video/mp4"></video>`;
             } else {
                 // Обычное фото или GIF (оба отображаются через img, GIF будет автопроигрываться)
-                console.log(`[Frontend] Участник ${member.id}: определяем как фото/GIF`);
                 // Используем loading="lazy" для ленивой загрузки
                 avatarHtml = `<img class="member-avatar-img" src="${escapeHtml(photoUrl)}" alt="${escapeHtml(displayName)}" loading="lazy" onerror="console.error('[Frontend] Ошибка загрузки фото участника ${member.id}'); this.parentElement.innerHTML='<div class=\\'member-avatar-text\\'>${initials}</div>'" />`;
             }
         } else {
             // Если нет фото, показываем инициалы
-            console.log(`[Frontend] Участник ${member.id}: нет profile_photo_url, показываем инициалы`);
             avatarHtml = `<div class="member-avatar-text">${initials}</div>`;
         }
         
@@ -214,6 +211,9 @@ function renderMembers(members) {
         `;
     }).join('');
     
+    // Одна запись на страницу вместо нескольких на каждого участника
+    console.log(`[Frontend] Отрисовано участников: ${sortedMembers.length}, с фото: ${withPhoto}`);
+    
     // Инициализируем иконки
     lucide.createIcons();
 }
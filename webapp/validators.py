@@ -1,22 +1,28 @@
 """Валидация входных данных для API endpoints"""
 from typing import Optional
 from pydantic import BaseModel, Field, validator
+from werkzeug.routing import BaseConverter
 import logging
 
+from bot.constants import WEBAPP_INIT_DATA_MAX_LENGTH
+
 logger = logging.getLogger(__name__)
 
 
-class ChatListRequest(BaseModel):
-    """Модель валидации запроса списка чатов"""
+class WebAppRequest(BaseModel):
+    """
+    Базовая модель запроса Mini App с данными Telegram WebApp.
+    
+    ID пользователя берется из подписанных init_data. user_id в теле
+    необязателен: если передан, должен совпадать с ID из init_data.
+    """
     init_data: str = Field(..., description="Данные от Telegram WebApp")
-    user_id: int = Field(..., gt=0, description="ID пользователя Telegram")
-    page: int = Field(1, ge=1, description="Номер страницы (начинается с 1)")
-    per_page: int = Field(20, ge=1, le=100, description="Количество чатов на странице (1-100)")
+    user_id: Optional[int] = Field(None, gt=0, description="ID пользователя Telegram")
     
     @validator('user_id')
     def validate_user_id(cls, v):
         """Валидация user_id"""
-        if not isinstance(v, int) or v <= 0:
+        if v is not None and (not isinstance(v, int) or v <= 0):
             raise ValueError("user_id должен быть положительным целым числом")
         return v
     
@@ -25,41 +31,39 @@ class ChatListRequest(BaseModel):
         """Валидация init_data"""
         if not isinstance(v, str) or len(v) == 0:
             raise ValueError("init_data не может быть пустым")
-        if len(v) > 10000:  # Разумный лимит
+        if len(v) > WEBAPP_INIT_DATA_MAX_LENGTH:
             raise ValueError("init_data слишком длинный")
         return v
 
 
-class ChatMembersRequest(BaseModel):
+class ChatListRequest(WebAppRequest):
+    """Модель валидации запроса списка чатов"""
+    page: int = Field(1, ge=1, description="Номер страницы (начинается с 1)")
+    per_page: int = Field(20, ge=1, le=100, description="Количество чатов на странице (1-100)")
+    limit: Optional[int] = Field(None, ge=1, le=200, description="Размер окна хранилища для проверки (1-200)")
+    offset: int = Field(0, ge=0, description="Смещение окна хранилища")
+
+
+class ChatMembersRequest(WebAppRequest):
     """Модель валидации запроса участников чата"""
-    user_id: int = Field(..., gt=0, description="ID пользователя Telegram")
-    
-    @validator('user_id')
-    def validate_user_id(cls, v):
-        """Валидация user_id"""
-        if not isinstance(v, int) or v <= 0:
-            raise ValueError("user_id должен быть положительным целым числом")
-        return v
 
 
-def validate_chat_id(chat_id: str) -> int:
+class ChatDeleteRequest(WebAppRequest):
+    """Модель валидации запроса удаления чата из списка"""
+
+
+class ChatIdConverter(BaseConverter):
     """
-    Валидирует и преобразует chat_id в int.
+    URL конвертер ID чата: ненулевое целое число, в том числе отрицательное.
     
-    Args:
-        chat_id: Строка с ID чата
-        
-    Returns:
-        int: Валидный ID чата
-        
-    Raises:
-        ValueError: Если chat_id невалиден
+    Встроенный конвертер int не принимает знак, а ID групп в Telegram
+    отрицательные. Невалидный ID не совпадает с маршрутом: запрос получает
+    404 при маршрутизации, до rate limiter и view.
     """
-    try:
-        chat_id_int = int(chat_id)
-        # Telegram chat_id может быть отрицательным для групп
-        if chat_id_int == 0:
-            raise ValueError("chat_id не может быть 0")
-        return chat_id_int
-    except (ValueError, TypeError) as e:
-        raise ValueError(f"Неверный формат chat_id: {chat_id}") from e
+    regex = r'-?[1-9]\d*'
+    
+    def to_python(self, value: str) -> int:
+        return int(value)
+    
+    def to_url(self, value: int) -> str:
+        return str(value)